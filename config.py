@@ -2,9 +2,10 @@
 Módulo de configuração da UX Auditor API.
 Centraliza variáveis de ambiente usando pydantic-settings.
 """
+from functools import cached_property, lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import computed_field
-from typing import Optional
+from typing import Any, List, Optional
 
 
 class Settings(BaseSettings):
@@ -34,11 +35,24 @@ class Settings(BaseSettings):
     RABBIT_PORT: int = 5672
 
     # --- Montagem automática da URL ---
+    # cached_property: a URL é montada no primeiro acesso e reaproveitada depois
     @computed_field
-    @property
+    @cached_property
     def RABBITMQ_URL(self) -> str:
         return f"amqp://{self.RABBIT_USER}:{self.RABBIT_PASS}@{self.RABBIT_HOST}:{self.RABBIT_PORT}/"
     RABBITMQ_QUEUE: str = "raw_sessions"
+    # Máximo de canais AMQP abertos em paralelo pela API para publicar jobs
+    RABBITMQ_CHANNEL_POOL_SIZE: int = 16
+    RABBITMQ_HEARTBEAT: int = 30
+    # Publisher confirms nos canais da API (False troca a garantia de entrega por latência)
+    RABBITMQ_PUBLISHER_CONFIRMS: bool = True
+    # Publicação em segundo plano do /ingest (0 = publica dentro da requisição)
+    PUBLISH_WORKERS: int = 0
+    PUBLISH_QUEUE_MAX_BYTES: int = 64 * 1024 * 1024
+    PUBLISH_RETRY_DELAY: float = 0.5
+    PUBLISH_MAX_RETRY_DELAY: float = 30.0
+    # Limiar da geração 0 do coletor cíclico no worker (padrão do CPython: 700)
+    WORKER_GC_THRESHOLD: int = 50000
     
     # Configuração MinIO (Storage S3-Compatible)
     MINIO_ENDPOINT: str
@@ -46,10 +60,18 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str
     MINIO_DEFAULT_BUCKETS: str
     MINIO_REGION: str = "us-east-1"
+    # Cache em memória dos objetos de sessão lidos do storage (0 desativa)
+    STORAGE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    STORAGE_CACHE_TTL: int = 300
     
     # Configuração da Aplicação
     APP_HOST: str = "0.0.0.0"
     APP_PORT: int = 8000
+    # Origens liberadas no CORS (JSON no .env, ex.: ["https://app.exemplo.com"]).
+    # Vazio por padrão: cada deploy declara as suas. "*" desliga as credenciais.
+    CORS_ALLOWED_ORIGINS: List[str] = []
+    # Tempo (s) que o navegador pode cachear a resposta do preflight
+    CORS_MAX_AGE: int = 86400
 
     # Configuração do pipeline semântico híbrido
     LONG_IDLE_MS: int = 3000
@@ -73,6 +95,10 @@ class Settings(BaseSettings):
     REPEATED_ACTION_WINDOW_MS: int = 2000
     INPUT_REVISION_MIN_CHANGES: int = 2
     SELECTIVE_REVISIT_MIN_COUNT: int = 2
+    # Abaixo deste número de ações brutas, as fases 1 e 2 usam só o caminho determinístico
+    LLM_MIN_RAW_ACTIONS: int = 1
+    # Isolation Forest pré-treinado (train_iforest.py); sem ele, o modelo é treinado por sessão
+    ML_IFOREST_MODEL_PATH: Optional[str] = None
     
     # Configuração PostgreSQL (SQLModel/SQLAlchemy)
     # URL de conexão com o banco de dados
@@ -84,7 +110,7 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int = 5432
     
     @computed_field
-    @property
+    @cached_property
     def database_url(self) -> str:
         """
         Retorna a URL de conexão com o banco de dados.
@@ -101,5 +127,21 @@ class Settings(BaseSettings):
     )
 
 
-# Instância global de configurações
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Retorna a instância única de configurações.
+
+    A leitura do .env e das variáveis de ambiente só acontece no primeiro
+    acesso; chamadas seguintes devolvem o objeto já validado. Pode ser usada
+    diretamente como dependência do FastAPI (`Depends(get_settings)`).
+    """
+    return Settings()
+
+
+def __getattr__(name: str) -> Any:
+    # Mantém `from config import settings` funcionando sem instanciar
+    # Settings no import do módulo (PEP 562).
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -9,14 +9,19 @@ Este módulo fornece:
 Migração do Prisma para SQLModel realizada para eliminar problemas
 de binários no Docker.
 """
-from typing import Generator
+import logging
+from typing import Any, Generator
 
+import orjson
 from sqlmodel import SQLModel, Session, create_engine
-from sqlalchemy import event
+from sqlalchemy import event, text
+from sqlalchemy.orm import sessionmaker
 from sqlalchemy.engine import Engine
 
 from config import settings
 
+logger = logging.getLogger(__name__)
+
 
 # ============================================
 # Engine de Conexão
@@ -25,10 +30,21 @@ from config import settings
 # URL do banco de dados (usa computed field do settings)
 DATABASE_URL = settings.database_url
 
+
+def _json_serializer(value: Any) -> str:
+    # OPT_NON_STR_KEYS mantém o comportamento do json.dumps com chaves não-str
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+
 # Criação do engine síncrono
 # pool_pre_ping: verifica conexões obsoletas antes de usar
 # pool_size: número de conexões no pool
 # max_overflow: conexões adicionais permitidas além do pool_size
+# pool_use_lifo: reutiliza a conexão devolvida mais recentemente, mantendo
+#   poucas conexões "quentes" e deixando as ociosas expirarem
+# query_cache_size: cache de SQL compilado maior que o padrão (500)
+# json_serializer/json_deserializer: colunas JSON (bundle semântico, insights,
+#   saída do LLM) codificadas e lidas com orjson em vez do json da stdlib
 engine = create_engine(
     DATABASE_URL,
     echo=False,  # Define como True para debug SQL
@@ -36,19 +52,55 @@ engine = create_engine(
     pool_size=5,
     max_overflow=10,
     pool_recycle=3600,  # Recicla conexões após 1 hora
+    pool_use_lifo=True,
+    pool_reset_on_return="rollback",
+    query_cache_size=1200,
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
 )
 
 
+@event.listens_for(engine, "connect")
+def _disable_jit(dbapi_connection, connection_record) -> None:
+    """
+    Desliga o JIT do PostgreSQL em cada nova conexão.
+
+    As consultas da API são curtas (lookup por chave/índice); o custo de
+    compilação JIT supera o ganho nesse perfil. O SET roda em autocommit
+    para não ser desfeito pelo rollback do pool ao devolver a conexão.
+    """
+    existing_autocommit = dbapi_connection.autocommit
+    dbapi_connection.autocommit = True
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SET jit = off")
+    finally:
+        cursor.close()
+        dbapi_connection.autocommit = existing_autocommit
+
+
 # ============================================
 # Configuração de Sessão
 # ============================================
 
+# Fábrica de sessões criada uma única vez no import do módulo
+# expire_on_commit=False: objetos continuam legíveis após o commit sem novo SELECT
+# autoflush=False: leituras não disparam flush implícito de alterações pendentes
+SessionLocal = sessionmaker(
+    bind=engine,
+    class_=Session,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
+
 def get_session() -> Generator[Session, None, None]:
     """
     Dependência FastAPI para injeção de sessão do banco de dados.
     
-    Esta função cria uma nova sessão para cada requisição e garante
-    que ela seja fechada corretamente ao final, mesmo em caso de erros.
+    Esta função abre uma sessão a partir da fábrica compartilhada para cada
+    requisição; o context manager garante o fechamento ao final, mesmo em
+    caso de erros.
     
     Uso:
         @app.post("/users")
@@ -60,11 +112,8 @@ def get_session() -> Generator[Session, None, None]:
     Yields:
         Session: Sessão do SQLModel para operações de banco de dados
     """
-    with Session(engine) as session:
-        try:
-            yield session
-        finally:
-            session.close()
+    with SessionLocal() as session:
+        yield session
 
 
 # ============================================
@@ -86,7 +135,22 @@ def create_db_and_tables():
     from services.core.models import User, SessionAnalysis  # noqa: F401
     
     SQLModel.metadata.create_all(engine)
-    print("✓ Tabelas do banco de dados criadas/verificadas")
+    _add_missing_columns()
+    logger.info("✓ Tabelas do banco de dados criadas/verificadas")
+
+
+# Colunas adicionadas depois da criação das tabelas. O create_all não altera
+# tabelas existentes; sem migrações (Alembic), elas são adicionadas aqui de
+# forma idempotente. Ver "Atualização de bancos existentes" no README.
+_ADDED_COLUMNS = (
+    "ALTER TABLE session_analyses ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+)
+
+
+def _add_missing_columns() -> None:
+    with engine.begin() as connection:
+        for statement in _ADDED_COLUMNS:
+            connection.execute(text(statement))
 
 
 def init_db():
@@ -97,7 +161,7 @@ def init_db():
     """
     try:
         create_db_and_tables()
-        print("✓ Banco de dados inicializado com sucesso")
+        logger.info("✓ Banco de dados inicializado com sucesso")
     except Exception as e:
-        print(f"✗ Erro ao inicializar banco de dados: {e}")
+        logger.error("✗ Erro ao inicializar banco de dados: %s", e)
         raise
@@ -1,12 +1,16 @@
 import uvicorn
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
-import uuid
-import json
+import time
+import asyncio
 import aio_pika
-import requests
+import aiohttp
+import orjson
+from aio_pika.pool import Pool
+from pydantic import TypeAdapter, ValidationError
 
 # Importação da Configuração
 from config import settings
@@ -14,6 +18,7 @@ from utils.logging_config import configure_logging
 
 # Importação dos Modelos
 from services.core.auth import get_current_user, TokenData
+from services.core.job_queue import JobPublishQueue
 from services.core.models import RegisterRequest, RegisterResponse, SessionAnalysis, User
 from services.core.storage import storage_service
 from services.session_processing.models import (
@@ -25,28 +30,71 @@ from services.session_processing.models import (
     SessionProcessResponse,
     SessionProcessStats,
 )
-from services.session_processing.session_job_processor import mark_analysis_status
+from services.session_processing.ingest_jobs import build_ingest_job_body, validate_ingest_payload
 # Importação do Banco de Dados (SQLModel)
 from database import get_session, init_db
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlmodel import Session as DBSession, select
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida da aplicação.
+
+    Antes de aceitar a primeira requisição: conecta ao RabbitMQ (fila declarada
+    e canais do pool já abertos), inicia a fila de publicação, inicializa o
+    banco SQLModel e abre a sessão HTTP do Janus. No encerramento, publica os
+    jobs pendentes e fecha as conexões RabbitMQ e HTTP.
+    """
+    try:
+        await rabbitmq.connect()
+        await rabbitmq.declare_queue()
+        await rabbitmq.warm_up()
+        logger.info("Conectado ao RabbitMQ em %s", settings.RABBITMQ_URL)
+    except Exception as e:
+        logger.exception("Falha ao conectar ao RabbitMQ: %s", e)
+    job_publisher.start()
+
+    try:
+        # Inicializa o banco de dados SQLModel
+        init_db()
+        logger.info("Conectado ao banco de dados PostgreSQL via SQLModel")
+    except Exception as e:
+        logger.exception("Falha ao conectar ao banco de dados: %s", e)
+
+    janus_http.get()
+
+    yield
+
+    await job_publisher.stop()
+    await rabbitmq.close()
+    logger.info("Conexão RabbitMQ fechada")
+    await janus_http.close()
+
+
 # Inicialização da Aplicação
 app = FastAPI(
     title="UX Auditor API",
     description="Backend para análise comportamental de sessões de usuário (rrweb) via ML, heurísticas e LLM.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 logger = configure_logging("ux-auditor-api", "api.log")
 
 # Configuração Global de CORS
-# Permite integração com frontends Next.js e extensões de navegador
+# Permite integração com frontends Next.js e extensões de navegador.
+# Origens, métodos e headers explícitos + max_age deixam o navegador
+# cachear o preflight e evitam um OPTIONS extra por requisição.
+# Credenciais só valem com origens explícitas: com "*" o Starlette ecoaria
+# qualquer Origin, o que a especificação de CORS proíbe.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=settings.CORS_ALLOWED_ORIGINS,
+    allow_credentials="*" not in settings.CORS_ALLOWED_ORIGINS,
+    allow_methods=["GET", "POST"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=settings.CORS_MAX_AGE,
 )
 
 
@@ -54,40 +102,81 @@ app.add_middleware(
 class RabbitMQConnection:
     """
     Classe singleton para gerenciar conexão RabbitMQ.
-    Reutiliza a conexão entre requisições para melhor performance.
+    A conexão robusta (com heartbeat e reconexão automática do aio_pika) e o
+    pool de canais são criados uma única vez no startup; publicações
+    concorrentes usam canais distintos do pool.
     """
     _instance = None
     _connection = None
-    _channel = None
+    _channel_pool: Optional[Pool] = None
+    _connect_lock: Optional[asyncio.Lock] = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    async def get_connection(self):
+    async def connect(self) -> None:
         """
-        Obtém ou cria conexão RabbitMQ.
-        
-        Returns:
-            aio_pika.RobustConnection: Conexão RabbitMQ ativa
+        Abre a conexão robusta e monta o pool de canais.
+
+        Depois disso a reconexão é responsabilidade do ``connect_robust``;
+        não há verificação de ``is_closed`` por publicação.
         """
-        if self._connection is None or self._connection.is_closed:
-            self._connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
-        return self._connection
+        self._connection = await aio_pika.connect_robust(
+            settings.RABBITMQ_URL,
+            heartbeat=settings.RABBITMQ_HEARTBEAT,
+        )
+        self._channel_pool = Pool(
+            self._create_channel,
+            max_size=settings.RABBITMQ_CHANNEL_POOL_SIZE,
+        )
+
+    async def _create_channel(self) -> aio_pika.abc.AbstractChannel:
+        # Com publisher confirms (padrão), publish() só retorna após o ack do broker.
+        # Sem eles o publish não espera o RTT do broker, mas um job pode se perder
+        # se o broker cair antes de persistir a mensagem.
+        return await self._connection.channel(
+            publisher_confirms=settings.RABBITMQ_PUBLISHER_CONFIRMS,
+        )
 
-    async def get_channel(self):
+    async def get_channel_pool(self) -> Pool:
         """
-        Obtém ou cria canal RabbitMQ.
-        
+        Retorna o pool de canais RabbitMQ.
+
+        Só conecta aqui se o startup não conseguiu (broker indisponível na
+        subida); o lock evita conexões duplicadas entre requisições concorrentes.
+
         Returns:
-            aio_pika.RobustChannel: Canal RabbitMQ ativo
+            Pool: Pool limitado a RABBITMQ_CHANNEL_POOL_SIZE canais
+        """
+        if self._channel_pool is None:
+            if self._connect_lock is None:
+                self._connect_lock = asyncio.Lock()
+            async with self._connect_lock:
+                if self._channel_pool is None:
+                    await self.connect()
+        return self._channel_pool
+
+    async def warm_up(self) -> None:
+        """
+        Abre todos os canais do pool de uma vez (chamado no startup).
+
+        O Pool do aio_pika cria canais sob demanda e sob lock; sem o aquecimento,
+        as primeiras rajadas de /ingest pagam a abertura de canal em série.
+        """
+        pool = await self.get_channel_pool()
+        async with AsyncExitStack() as stack:
+            for _ in range(settings.RABBITMQ_CHANNEL_POOL_SIZE):
+                await stack.enter_async_context(pool.acquire())
+
+    async def declare_queue(self) -> None:
         """
-        if self._channel is None or self._channel.is_closed:
-            connection = await self.get_connection()
-            self._channel = await connection.channel()
-            # Declara a fila
-            await self._channel.declare_queue(
+        Declara a fila de jobs uma única vez (chamado no startup).
+        """
+        pool = await self.get_channel_pool()
+        async with pool.acquire() as channel:
+            await channel.declare_queue(
                 settings.RABBITMQ_QUEUE,
                 durable=True,
                 arguments={
@@ -95,15 +184,14 @@ class RabbitMQConnection:
                 'x-delivery-limit': 5
                 }
             )
-        return self._channel
 
     async def close(self):
         """
-        Fecha conexão e canal RabbitMQ.
+        Fecha o pool de canais e a conexão RabbitMQ.
         """
-        if self._channel and not self._channel.is_closed:
-            await self._channel.close()
-            self._channel = None
+        if self._channel_pool and not self._channel_pool.is_closed:
+            await self._channel_pool.close()
+            self._channel_pool = None
         if self._connection and not self._connection.is_closed:
             await self._connection.close()
             self._connection = None
@@ -113,16 +201,136 @@ class RabbitMQConnection:
 rabbitmq = RabbitMQConnection()
 
 
+class JanusHTTPClient:
+    """
+    Sessão HTTP compartilhada com o Janus IDP.
+
+    Criada no primeiro uso (dentro do event loop) e fechada no shutdown; o pool
+    keep-alive do aiohttp evita um handshake TCP/TLS por registro.
+    """
+
+    def __init__(self) -> None:
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def get(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"X-Service-Key": settings.JANUS_SERVICE_API_KEY},
+                timeout=aiohttp.ClientTimeout(total=10),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+janus_http = JanusHTTPClient()
+
+# Propriedades fixas de todo job publicado, montadas uma vez só.
+_JOB_MESSAGE_PROPERTIES: Dict[str, Any] = {
+    "content_type": "application/json",
+    "delivery_mode": aio_pika.DeliveryMode.PERSISTENT,
+}
+
+
 async def publish_job_message(payload: Dict[str, Any]) -> None:
     """Publica um job assíncrono na fila de processamento."""
-    channel = await rabbitmq.get_channel()
-    await channel.default_exchange.publish(
-        aio_pika.Message(
-            body=json.dumps(payload).encode("utf-8"),
-            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-        ),
-        routing_key=settings.RABBITMQ_QUEUE,
+    # orjson já gera bytes UTF-8, sem a cópia intermediária em str
+    await publish_job_body(orjson.dumps(payload))
+
+
+async def publish_job_body(body: bytes) -> None:
+    """Publica um job cujo corpo JSON já está serializado."""
+    pool = await rabbitmq.get_channel_pool()
+    async with pool.acquire() as channel:
+        await channel.default_exchange.publish(
+            aio_pika.Message(body=body, **_JOB_MESSAGE_PROPERTIES),
+            routing_key=settings.RABBITMQ_QUEUE,
+        )
+
+
+job_publisher = JobPublishQueue(
+    publish_job_body,
+    workers=settings.PUBLISH_WORKERS,
+    max_bytes=settings.PUBLISH_QUEUE_MAX_BYTES,
+    retry_delay=settings.PUBLISH_RETRY_DELAY,
+    max_retry_delay=settings.PUBLISH_MAX_RETRY_DELAY,
+)
+
+
+# Validador do lote montado uma única vez.
+_INGEST_BATCH_ADAPTER = TypeAdapter(List[ExtensionSessionPayload])
+
+
+def _load_ingest_body(raw_body: bytes) -> Any:
+    """
+    Decodifica o corpo JSON do /ingest com orjson.
+
+    Validar os objetos já decodificados é mais barato que ``validate_json``: os
+    campos ``Dict[str, Any]`` (o ``data`` de cada evento rrweb, que carrega os
+    snapshots do DOM) passam por referência em vez de serem reconstruídos pelo
+    parser do Pydantic. JSON malformado responde 422 no mesmo formato de erro.
+    """
+    try:
+        return orjson.loads(raw_body)
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=[{"type": "json_invalid", "loc": [], "msg": f"Invalid JSON: {e}"}],
+        )
+
+
+# Os handlers de ingestão leem o corpo bruto (Request) em vez de declarar um
+# parâmetro de corpo; o schema é declarado à mão para continuar no OpenAPI.
+_INGEST_PAYLOAD_REF = {"$ref": "#/components/schemas/ExtensionSessionPayload"}
+
+
+def _ingest_request_body(schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+
+_default_openapi = app.openapi
+
+
+def _openapi_with_ingest_schemas() -> Dict[str, Any]:
+    """Gera o OpenAPI padrão e registra o schema do payload da extensão."""
+    if app.openapi_schema is None:
+        openapi_schema = _default_openapi()
+        payload_schema = ExtensionSessionPayload.model_json_schema(ref_template="#/components/schemas/{model}")
+        components = openapi_schema.setdefault("components", {}).setdefault("schemas", {})
+        for name, definition in payload_schema.pop("$defs", {}).items():
+            components.setdefault(name, definition)
+        components.setdefault("ExtensionSessionPayload", payload_schema)
+    return app.openapi_schema
+
+
+app.openapi = _openapi_with_ingest_schemas
+
+
+# As sessões SQLModel são síncronas: os handlers async chamam os helpers abaixo
+# via asyncio.to_thread para que o round-trip ao banco não pare o event loop.
+def _find_user_analysis(session: DBSession, session_uuid: str, user_id: str) -> Optional[SessionAnalysis]:
+    """Busca a análise da sessão restrita ao usuário dono."""
+    statement = select(SessionAnalysis).where(
+        SessionAnalysis.session_uuid == session_uuid,
+        SessionAnalysis.user_id == user_id,
+    )
+    return session.exec(statement).first()
+
+
+def _insert_local_user(session: DBSession, user_id: str, email: str, name: str) -> Optional[str]:
+    """Cria o usuário local; devolve ``None`` se o ID já existia (ON CONFLICT DO NOTHING)."""
+    statement = (
+        pg_insert(User)
+        .values(id=user_id, email=email, name=name)
+        .on_conflict_do_nothing(index_elements=[User.id])
+        .returning(User.id)
     )
+    inserted_id = session.exec(statement).scalar_one_or_none()
+    session.commit()
+    return inserted_id
 
 
 def _session_analysis_to_response(analysis: SessionAnalysis) -> SessionProcessResponse:
@@ -141,7 +349,9 @@ def _session_analysis_to_response(analysis: SessionAnalysis) -> SessionProcessRe
         "rage_clicks": 0,
     }
 
-    return SessionProcessResponse(
+    # Os blocos vêm de linhas gravadas pelo próprio worker a partir de modelos já
+    # validados: model_construct evita revalidar (e copiar) bundle e insights.
+    return SessionProcessResponse.model_construct(
         session_uuid=analysis.session_uuid,
         user_id=analysis.user_id,
         narrative=narrative_block.get("text", ""),
@@ -177,33 +387,6 @@ def _session_analysis_to_history_item(analysis: SessionAnalysis) -> SessionHisto
     )
 
 
-@app.on_event("startup")
-async def startup_event():
-    """
-    Inicializa conexão RabbitMQ e banco de dados SQLModel ao iniciar a aplicação.
-    """
-    try:
-        await rabbitmq.get_channel()
-        logger.info("Conectado ao RabbitMQ em %s", settings.RABBITMQ_URL)
-    except Exception as e:
-        logger.exception("Falha ao conectar ao RabbitMQ: %s", e)
-    
-    try:
-        # Inicializa o banco de dados SQLModel
-        init_db()
-        logger.info("Conectado ao banco de dados PostgreSQL via SQLModel")
-    except Exception as e:
-        logger.exception("Falha ao conectar ao banco de dados: %s", e)
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """
-    Fecha conexão RabbitMQ ao encerrar a aplicação.
-    """
-    await rabbitmq.close()
-    logger.info("Conexão RabbitMQ fechada")
-
 @app.get("/health")
 async def health_check():
     """
@@ -234,9 +417,9 @@ async def register_user(
     3. Passo B: Se o Janus retornar sucesso (201 Created ou 200 OK), pega o 'id' (UUID)
        - 201 Created: Novo usuário criado e vinculado ao cliente
        - 200 OK: Usuário existente vinculado ao cliente (idempotência)
-    4. Passo C: Verifica se o usuário já existe localmente antes de criar
-    5. Passo D: Cria o usuário no banco local do UX Auditor (tabela 'users')
-       usando EXATAMENTE o mesmo 'id' retornado pelo Janus
+    4. Passo C/D: Cria o usuário no banco local do UX Auditor (tabela 'users')
+       usando EXATAMENTE o mesmo 'id' retornado pelo Janus, com
+       ``INSERT ... ON CONFLICT DO NOTHING`` (já existente = idempotência)
     6. Passo E: Se falhar no banco local, rollback SELETIVO no Janus
        - Só deleta se o status original foi 201 (novo usuário)
        - Não deleta se foi 200 (usuário já existente usado por outros sistemas)
@@ -272,27 +455,20 @@ async def register_user(
         "name": request.name,
         "clientId": settings.JANUS_CLIENT_ID  # Identificador da aplicação para vínculo
     }
-    headers = {
-        "X-Service-Key": settings.JANUS_SERVICE_API_KEY,
-        "Content-Type": "application/json"
-    }
     
     try:
         logger.info("Sending registration request to Janus: %s", janus_url)
         logger.info("ClientID: %s", settings.JANUS_CLIENT_ID)
-        janus_response = requests.post(
-            janus_url,
-            json=janus_payload,
-            headers=headers,
-            timeout=10
-        )
-        
-        # Captura o status code para determinar o tipo de resposta
-        janus_status_code = janus_response.status_code
+        # Sessão aiohttp compartilhada (X-Service-Key e timeout já configurados):
+        # a espera pelo Janus não bloqueia o event loop e a conexão é reaproveitada.
+        async with janus_http.get().post(janus_url, json=janus_payload) as janus_response:
+            # Captura o status code para determinar o tipo de resposta
+            janus_status_code = janus_response.status
+            janus_body = await janus_response.read()
         
         # Verifica se a requisição foi bem-sucedida (201 Created ou 200 OK)
         if janus_status_code not in [200, 201]:
-            error_detail = janus_response.text
+            error_detail = janus_body.decode("utf-8", errors="replace")
             logger.error(
                 "Janus registration failed with status %s: %s",
                 janus_status_code,
@@ -312,7 +488,7 @@ async def register_user(
             should_rollback_janus = False  # Usuário existente NÃO deve ser deletado
         
         # Passo B: Extrai o 'id' (UUID) retornado pelo Janus
-        janus_data = janus_response.json()
+        janus_data = orjson.loads(janus_body)
         user_id = janus_data.get("id")
         
         if not user_id:
@@ -324,42 +500,23 @@ async def register_user(
         
         logger.info("User %s in Janus with ID: %s", "created" if janus_status_code == 201 else "linked", user_id)
         
-    except requests.RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError) as e:
         logger.exception("Failed to connect to Janus service: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to connect to Janus service: {str(e)}"
         )
     
-    # Passo C: Verifica se o usuário já existe localmente (resiliência a re-tentativas)
-    try:
-        existing_user = session.get(User, user_id)
-        if existing_user:
-            logger.info("User already exists in local database: %s", user_id)
-            # Usuário já existe localmente, retorna sucesso (idempotência)
-            return RegisterResponse(
-                id=user_id,
-                email=existing_user.email,
-                name=existing_user.name,
-                message="User already registered and synchronized"
-            )
-    except Exception as e:
-        logger.warning("Error checking local user existence: %s", e)
-        # Continua para tentar criar o usuário
-    
-    # Passo D: Cria o usuário no banco local do UX Auditor usando o mesmo ID
+    # Passos C e D: cria o usuário local com o mesmo ID num único INSERT ... ON CONFLICT.
+    # Se o ID já existir (re-tentativa), nada é inserido e o RETURNING vem vazio.
     try:
         logger.info("Creating user in local database with ID: %s", user_id)
         
-        # Cria novo usuário
-        new_user = User(
-            id=user_id,
-            email=request.email,
-            name=request.name
+        inserted_id = await asyncio.to_thread(
+            _insert_local_user, session, user_id, request.email, request.name
         )
-        session.add(new_user)
-        session.commit()
-        logger.info("User created in local database: %s", user_id)
+        if inserted_id is not None:
+            logger.info("User created in local database: %s", user_id)
         
     except Exception as e:
         # Passo E: Rollback seletivo no Janus
@@ -372,18 +529,12 @@ async def register_user(
             logger.info("Attempting rollback in Janus (user was newly created)...")
             try:
                 delete_url = f"{settings.JANUS_API_URL}/api/users/{user_id}"
-                delete_headers = {
-                    "X-Service-Key": settings.JANUS_SERVICE_API_KEY
-                }
-                delete_response = requests.delete(
-                    delete_url,
-                    headers=delete_headers,
-                    timeout=10
-                )
-                if delete_response.status_code in [200, 204]:
+                async with janus_http.get().delete(delete_url) as delete_response:
+                    delete_status_code = delete_response.status
+                if delete_status_code in [200, 204]:
                     logger.info("Rolled back user creation in Janus: %s", user_id)
                 else:
-                    logger.warning("Failed to rollback user in Janus: %s", delete_response.status_code)
+                    logger.warning("Failed to rollback user in Janus: %s", delete_status_code)
             except Exception as rollback_error:
                 logger.warning("Failed to rollback user in Janus: %s", rollback_error)
         else:
@@ -395,6 +546,17 @@ async def register_user(
             detail=f"Failed to create user in local database: {str(e)}"
         )
     
+    if inserted_id is None:
+        # Usuário já existe localmente, retorna sucesso (idempotência)
+        logger.info("User already exists in local database: %s", user_id)
+        existing_user = await asyncio.to_thread(session.get, User, user_id)
+        return RegisterResponse(
+            id=user_id,
+            email=existing_user.email,
+            name=existing_user.name,
+            message="User already registered and synchronized"
+        )
+    
     # Retorna sucesso
     return RegisterResponse(
         id=user_id,
@@ -404,9 +566,14 @@ async def register_user(
     )
 
 
-@app.post("/ingest", response_model=SessionJobSubmissionResponse, status_code=status.HTTP_202_ACCEPTED)
+@app.post(
+    "/ingest",
+    response_model=SessionJobSubmissionResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra=_ingest_request_body(_INGEST_PAYLOAD_REF),
+)
 async def ingest_session(
-    payload: ExtensionSessionPayload,
+    request: Request,
     current_user: TokenData = Depends(get_current_user)
 ) -> SessionJobSubmissionResponse:
     """
@@ -418,34 +585,38 @@ async def ingest_session(
     de interação pré-calculados no cliente.
     
     Fluxo:
-    1. Valida o payload contra o modelo ExtensionSessionPayload (Pydantic).
-    2. Extrai os eventos rrweb para o processamento de reconstrução.
-    3. Preserva o restante do payload como metadados para as fases de heurística e LLM.
-    4. Enfileira o job no RabbitMQ para processamento assíncrono.
+    1. Valida o corpo bruto contra o modelo ExtensionSessionPayload (decodificado
+       com orjson e validado pelo Pydantic).
+    2. Se o corpo passou na validação estrita, encaminha os bytes originais, sem
+       re-serializar, dentro do envelope do job (campo ``payload``), junto dos
+       metadados normalizados; se algum valor precisou de coerção, o job leva o
+       payload normalizado, como no /ingest/batch.
+    3. Entrega o job ao ``job_publisher``: por padrão publica no RabbitMQ antes
+       de responder; com PUBLISH_WORKERS > 0, a publicação sai em segundo plano.
+
+    Sessões rrweb chegam a vários MB: evitar o ciclo dict -> model_dump -> JSON
+    no caso comum elimina uma cópia completa do payload em memória e a
+    serialização de volta.
     """
-    session_uuid = str(uuid.uuid4())
-    
-    # Extração estruturada do payload validado pelo Pydantic.
-    # Convertemos os eventos rrweb para o formato de dicionário esperado pelo worker.
-    events = [event.model_dump(mode="json") for event in payload.rrweb.events]
-    
-    # Capturamos todos os metadados enriquecidos, excluindo a lista bruta de eventos 
-    # para evitar redundância no objeto de metadados enviado ao RabbitMQ.
-    metadata = payload.model_dump(mode="json", exclude={"rrweb"})
+    raw_body = await request.body()
+    try:
+        payload, raw_is_normalized = validate_ingest_payload(_load_ingest_body(raw_body))
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=e.errors(include_url=False, include_context=False),
+        )
 
-    message_payload = {
-        "job_type": "ingest",
-        "user_id": current_user.user_id,
-        "session_uuid": session_uuid,
-        "events": events,
-        "metadata": metadata, # Contém axe, semantics, interaction_summary, etc.
-        "timestamp": datetime.utcnow().isoformat(),
-    }
+    session_uuid, message_body = build_ingest_job_body(
+        payload,
+        current_user.user_id,
+        raw_body=raw_body if raw_is_normalized else None,
+    )
 
     logger.info("Enfileirando job de ingestão enriquecida | session_uuid=%s", session_uuid)
 
     try:
-        await publish_job_message(message_payload)
+        await job_publisher.submit(message_body)
         return SessionJobSubmissionResponse(
             status="queued",
             message="Eventos da sessão enfileirados para processamento assíncrono",
@@ -460,13 +631,70 @@ async def ingest_session(
         )
 
 
+@app.post(
+    "/ingest/batch",
+    response_model=List[SessionJobSubmissionResponse],
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra=_ingest_request_body({"type": "array", "items": _INGEST_PAYLOAD_REF}),
+)
+async def ingest_sessions_batch(
+    request: Request,
+    current_user: TokenData = Depends(get_current_user)
+) -> List[SessionJobSubmissionResponse]:
+    """
+    Variante em lote do /ingest para clientes que acumulam várias sessões.
+
+    Cada sessão vira um job independente, entregue ao mesmo ``job_publisher``
+    do /ingest; as publicações saem em paralelo por canais distintos do pool. Como no /ingest, o corpo é decodificado com orjson e
+    validado (lista de ExtensionSessionPayload) pelo adaptador pré-montado.
+    """
+    raw_body = await request.body()
+    try:
+        payloads = _INGEST_BATCH_ADAPTER.validate_python(_load_ingest_body(raw_body))
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=e.errors(include_url=False, include_context=False),
+        )
+
+    if not payloads:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Lote de sessões vazio",
+        )
+
+    messages = [build_ingest_job_body(payload, current_user.user_id) for payload in payloads]
+
+    logger.info("Enfileirando lote de ingestão | total=%s", len(messages))
+
+    try:
+        await asyncio.gather(*(job_publisher.submit(body) for _, body in messages))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Falha ao ingerir lote de sessões: {str(e)}"
+        )
+
+    return [
+        SessionJobSubmissionResponse(
+            status="queued",
+            message="Eventos da sessão enfileirados para processamento assíncrono",
+            session_uuid=session_uuid,
+            user_id=current_user.user_id,
+        )
+        for session_uuid, _ in messages
+    ]
+
+
 @app.get("/sessions", response_model=SessionHistoryResponse)
-async def list_user_sessions(
+def list_user_sessions(
     current_user: TokenData = Depends(get_current_user),
     session: DBSession = Depends(get_session),
 ) -> SessionHistoryResponse:
     """
     Lista as sessões já registradas do usuário autenticado.
+
+    Handler síncrono (threadpool do FastAPI): a consulta não bloqueia o event loop.
     """
     logger.info("Listando sessões do usuário | user_id=%s", current_user.user_id)
 
@@ -494,7 +722,7 @@ async def get_raw_session_payload(
     session_uuid: str,
     current_user: TokenData = Depends(get_current_user),
     session: DBSession = Depends(get_session),
-) -> Dict[str, Any]:
+) -> Response:
     """
     Retorna o payload bruto persistido no storage para a sessão do usuário.
     """
@@ -504,11 +732,7 @@ async def get_raw_session_payload(
         current_user.user_id,
     )
 
-    statement = select(SessionAnalysis).where(
-        SessionAnalysis.session_uuid == session_uuid,
-        SessionAnalysis.user_id == current_user.user_id,
-    )
-    analysis = session.exec(statement).first()
+    analysis = await asyncio.to_thread(_find_user_analysis, session, session_uuid, current_user.user_id)
 
     if not analysis:
         raise HTTPException(
@@ -516,24 +740,31 @@ async def get_raw_session_payload(
             detail="Sessão não encontrada para o usuário autenticado",
         )
 
-    raw_payload = await storage_service.get_session_data(current_user.user_id, session_uuid)
+    # O objeto no storage já é o JSON do payload: os bytes vão direto na resposta,
+    # sem parse nem re-serialização.
+    raw_payload = await storage_service.get_session_bytes(current_user.user_id, session_uuid)
 
     logger.info(
         "Payload bruto recuperado com sucesso | session_uuid=%s | user_id=%s",
         session_uuid,
         current_user.user_id,
     )
-    return raw_payload
+    return Response(content=raw_payload, media_type="application/json")
 
 
 @app.post("/sessions/{session_uuid}/reprocess", response_model=SessionJobSubmissionResponse, status_code=status.HTTP_202_ACCEPTED)
 async def reprocess_session(
     session_uuid: str,
+    force: bool = True,
     current_user: TokenData = Depends(get_current_user),
     session: DBSession = Depends(get_session),
 ) -> SessionJobSubmissionResponse:
     """
     Reenfileira o processamento de uma sessão já persistida no storage.
+
+    O reprocessamento sempre reexecuta o pipeline: os dados no storage não
+    mudam, mas prompts, heurísticas e modelos sim. ``force=false`` reaproveita
+    a análise salva se ela foi gerada a partir da mesma entrada.
     """
     logger.info(
         "Solicitando reprocessamento da sessão | session_uuid=%s | user_id=%s",
@@ -541,11 +772,7 @@ async def reprocess_session(
         current_user.user_id,
     )
 
-    statement = select(SessionAnalysis).where(
-        SessionAnalysis.session_uuid == session_uuid,
-        SessionAnalysis.user_id == current_user.user_id,
-    )
-    analysis = session.exec(statement).first()
+    analysis = await asyncio.to_thread(_find_user_analysis, session, session_uuid, current_user.user_id)
 
     if not analysis:
         raise HTTPException(
@@ -557,11 +784,17 @@ async def reprocess_session(
         "job_type": "reprocess",
         "user_id": current_user.user_id,
         "session_uuid": session_uuid,
-        "timestamp": datetime.utcnow().isoformat(),
+        "force": force,
+        "timestamp_ns": time.time_ns(),
     }
 
+    # Import tardio: o módulo de jobs puxa todo o pipeline semântico (LLM, sklearn),
+    # que a API só precisa ao reenfileirar uma sessão.
+    from services.session_processing.session_job_processor import mark_analysis_status
+
     try:
-        mark_analysis_status(
+        await asyncio.to_thread(
+            mark_analysis_status,
             session,
             user_id=current_user.user_id,
             session_uuid=session_uuid,
@@ -583,13 +816,16 @@ async def reprocess_session(
 
 
 @app.get("/sessions/{session_uuid}/status", response_model=SessionJobStatusResponse)
-async def get_session_status(
+def get_session_status(
     session_uuid: str,
     current_user: TokenData = Depends(get_current_user),
     session: DBSession = Depends(get_session),
-) -> SessionJobStatusResponse:
+) -> Response:
     """
     Consulta o estado do processamento assíncrono de uma sessão.
+
+    Handler síncrono: o FastAPI o executa no threadpool, então a consulta ao
+    banco e a montagem do resultado não bloqueiam o event loop.
     """
     logger.info(
         "Consultando status da sessão | session_uuid=%s | user_id=%s",
@@ -597,11 +833,7 @@ async def get_session_status(
         current_user.user_id,
     )
 
-    statement = select(SessionAnalysis).where(
-        SessionAnalysis.session_uuid == session_uuid,
-        SessionAnalysis.user_id == current_user.user_id,
-    )
-    analysis = session.exec(statement).first()
+    analysis = _find_user_analysis(session, session_uuid, current_user.user_id)
 
     if not analysis:
         response = SessionJobStatusResponse(
@@ -612,7 +844,7 @@ async def get_session_status(
             result=None,
         )
         logger.info("Sessão ainda sem análise persistida | response=%s", response.model_dump())
-        return response
+        return Response(content=response.model_dump_json(), media_type="application/json")
 
     result = None
     if analysis.processing_status == "completed":
@@ -627,12 +859,24 @@ async def get_session_status(
     )
 
     logger.info(
-        "Status da sessão recuperado | analysis_status=%s | response=%s",
+        "Status da sessão recuperado | session_uuid=%s | analysis_status=%s | has_result=%s",
+        session_uuid,
         analysis.processing_status,
-        response.model_dump(),
+        result is not None,
     )
-    return response
+    # O modelo já foi validado na construção; serializamos em pydantic-core e
+    # devolvemos a Response pronta para o FastAPI não revalidar o resultado.
+    return Response(content=response.model_dump_json(), media_type="application/json")
 
 if __name__ == "__main__":
     # Execução do servidor via Uvicorn usando configurações do config.py
-    uvicorn.run(app, host=settings.APP_HOST, port=settings.APP_PORT, log_config=None)
+    # A app é passada como import string para permitir múltiplos workers
+    # (WEB_CONCURRENCY); uvicorn[standard] traz uvloop e httptools.
+    uvicorn.run(
+        "main:app",
+        host=settings.APP_HOST,
+        port=settings.APP_PORT,
+        loop="uvloop",
+        http="httptools",
+        log_config=None,
+    )
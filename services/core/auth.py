@@ -3,12 +3,14 @@ Módulo de autenticação da UX Auditor API.
 Implementa Resource Server OAuth2 com validação de JWT para tokens emitidos pelo janus-idp.
 Suporta algoritmo RS256 (assimétrico) com JWKS dinâmico.
 """
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 from datetime import datetime
+import asyncio
+import hashlib
 import logging
 import time
 import jwt
-import json
 import requests
 from jwt.algorithms import RSAAlgorithm
 from fastapi import HTTPException, Request, status
@@ -36,6 +38,15 @@ _jwks_cache: Optional[Dict[str, Any]] = None
 _jwks_cache_time: Optional[float] = None
 # Tempo de vida do cache das chaves públicas (5 minutos)
 _JWKS_CACHE_TTL = 300  # 5 minutos
+# Chaves RSA já convertidas a partir do JWKS, indexadas pelo 'kid'.
+# Evita decodificar o base64url do módulo/expoente e remontar a chave a cada requisição.
+_public_key_cache: Dict[str, Any] = {}
+# Tokens já verificados, indexados pelo sha256 do token bruto.
+# Requisições seguidas do mesmo cliente (ex.: /ingest) não refazem a verificação RSA.
+# A validade de cada entrada nunca ultrapassa o 'exp' do próprio token.
+_verified_token_cache: "OrderedDict[str, Tuple[TokenData, float]]" = OrderedDict()
+_TOKEN_CACHE_TTL = 60  # segundos
+_TOKEN_CACHE_MAX_SIZE = 10_000
 
 
 def _extract_bearer_token(request: Request) -> str:
@@ -102,9 +113,11 @@ def _get_cached_jwks() -> Dict[str, Any]:
             detail="Resposta JWKS inválida",
         )
 
-    # Atualiza o cache global com as novas chaves e o timestamp atual
+    # Atualiza o cache global com as novas chaves e o timestamp atual.
+    # As chaves convertidas são descartadas para acompanhar uma eventual rotação no IDP.
     _jwks_cache = jwks
     _jwks_cache_time = current_time
+    _public_key_cache.clear()
     return jwks
 
 
@@ -158,6 +171,11 @@ def get_jwks_public_key(token: str) -> Any:
     # Busca o conjunto de chaves públicas disponíveis no IDP
     jwks = _get_cached_jwks()
 
+    # Reaproveita a chave já convertida enquanto o JWKS em cache for válido
+    cached_key = _public_key_cache.get(kid)
+    if cached_key is not None:
+        return cached_key
+
     # Procura no conjunto de chaves aquela que possui o ID (kid) presente no token
     keys = jwks.get("keys", [])
     jwk_key = None
@@ -175,8 +193,11 @@ def get_jwks_public_key(token: str) -> Any:
         )
 
     try:
-        # Converte a representação JSON da chave (JWK) em um objeto de chave RSA pública utilizável
-        return RSAAlgorithm.from_jwk(json.dumps(jwk_key))
+        # Converte a chave (JWK) em um objeto de chave RSA pública utilizável.
+        # O PyJWT aceita o dicionário diretamente, sem ida e volta por json.dumps.
+        public_key = RSAAlgorithm.from_jwk(jwk_key)
+        _public_key_cache[kid] = public_key
+        return public_key
     except HTTPException:
         raise
     except Exception as e:
@@ -327,6 +348,68 @@ def validate_token_payload(payload: Dict[str, Any]) -> TokenData:
     return TokenData(user_id=sub, exp=exp, iss=iss)
 
 
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _lookup_verified_token(cache_key: str, now: float) -> Optional[TokenData]:
+    """
+    Retorna o TokenData de uma verificação recente ainda válida, se houver.
+    """
+    cached = _verified_token_cache.get(cache_key)
+    if cached is None:
+        return None
+    token_data, expires_at = cached
+    if now < expires_at:
+        try:
+            _verified_token_cache.move_to_end(cache_key)
+        except KeyError:
+            # Removida por outra thread entre o get() e aqui; o valor lido segue válido
+            pass
+        return token_data
+    _verified_token_cache.pop(cache_key, None)
+    return None
+
+
+def _verify_token(token: str) -> TokenData:
+    """
+    Decodifica e valida o token, reaproveitando verificações recentes.
+
+    Em caso de acerto no cache, a assinatura e os claims não são verificados
+    de novo; a entrada expira em no máximo _TOKEN_CACHE_TTL segundos ou no
+    'exp' do token, o que vier primeiro.
+    """
+    cache_key = _token_cache_key(token)
+    now = time.time()
+
+    cached = _lookup_verified_token(cache_key, now)
+    if cached is not None:
+        return cached
+
+    payload = decode_jwt_token(token)
+    token_data = validate_token_payload(payload)
+
+    _verified_token_cache[cache_key] = (token_data, min(now + _TOKEN_CACHE_TTL, float(token_data.exp)))
+    if len(_verified_token_cache) > _TOKEN_CACHE_MAX_SIZE:
+        try:
+            _verified_token_cache.popitem(last=False)
+        except KeyError:
+            pass
+    return token_data
+
+
+async def _verify_token_async(token: str) -> TokenData:
+    """
+    Versão para as dependências async: o acerto no cache é resolvido no loop;
+    numa falta, a verificação RSA e uma eventual busca do JWKS (``requests``
+    síncrono, até 5 s de timeout) rodam em thread para não travar o event loop.
+    """
+    cached = _lookup_verified_token(_token_cache_key(token), time.time())
+    if cached is not None:
+        return cached
+    return await asyncio.to_thread(_verify_token, token)
+
+
 async def get_current_user(request: Request) -> TokenData:
     """
     Dependência FastAPI para autenticar e extrair informações do usuário do token JWT.
@@ -356,12 +439,9 @@ async def get_current_user(request: Request) -> TokenData:
     token = _extract_bearer_token(request)
     
     # 2. Decodifica e valida a integridade criptográfica e claims estruturais (iss, aud, exp)
-    payload = decode_jwt_token(token)
-    
     # 3. Valida se o payload contém os dados de identidade necessários para o negócio (sub)
-    token_data = validate_token_payload(payload)
-    
-    return token_data
+    # Ambos os passos são pulados se o mesmo token foi verificado há pouco.
+    return await _verify_token_async(token)
 
 
 async def get_current_user_optional(request: Request) -> Optional[TokenData]:
@@ -383,8 +463,6 @@ async def get_current_user_optional(request: Request) -> Optional[TokenData]:
         # Tenta o fluxo normal de validação. Se falhar em qualquer ponto (formato, assinatura, expiração),
         # retorna None em vez de interromper a requisição com 401.
         token = _extract_bearer_token(request)
-        payload = decode_jwt_token(token)
-        token_data = validate_token_payload(payload)
-        return token_data
+        return await _verify_token_async(token)
     except HTTPException:
         return None
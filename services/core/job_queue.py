@@ -0,0 +1,146 @@
+"""Fila em memória entre o /ingest e o RabbitMQ."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PublishFn = Callable[[bytes], Awaitable[None]]
+
+
+class JobPublishQueue:
+    """
+    Publicação dos jobs de ingestão em segundo plano.
+
+    A requisição só enfileira os bytes do job e responde; ``workers`` tarefas
+    drenam a fila publicando com ``publish``. O job só existe nessa mensagem (o
+    upload ao storage acontece no worker) e o cliente já recebeu 202, então uma
+    falha de publicação nunca descarta o corpo: ele volta para a fila após uma
+    espera crescente (de ``retry_delay`` até ``max_retry_delay`` segundos) e é
+    tentado de novo até ser publicado ou até o ``stop``. A espera roda em uma
+    tarefa própria, sem prender o worker que drena a fila.
+
+    A fila é limitada pelo total de bytes pendentes, incluindo os jobs à espera
+    de nova tentativa. Acima de ``max_bytes`` (ou com ``workers=0``) a
+    publicação acontece dentro da requisição, o que aplica backpressure e
+    devolve o erro do broker ao cliente em vez de aceitar um job que pode não
+    ser entregue.
+    """
+
+    def __init__(
+        self,
+        publish: PublishFn,
+        *,
+        workers: int,
+        max_bytes: int,
+        retry_delay: float = 0.5,
+        max_retry_delay: float = 30.0,
+    ) -> None:
+        self._publish = publish
+        self._worker_count = workers
+        self._max_bytes = max_bytes
+        self._retry_delay = retry_delay
+        self._max_retry_delay = max_retry_delay
+        self._queue: Optional["asyncio.Queue[Tuple[bytes, int]]"] = None
+        self._workers: List["asyncio.Task[None]"] = []
+        self._retries: Set["asyncio.Task[None]"] = set()
+        self._pending_bytes = 0
+
+    @property
+    def pending_bytes(self) -> int:
+        return self._pending_bytes
+
+    def start(self) -> None:
+        if self._worker_count <= 0 or self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._drain()) for _ in range(self._worker_count)]
+
+    async def _drain(self) -> None:
+        while True:
+            body, attempt = await self._queue.get()
+            try:
+                await self._publish(body)
+            except asyncio.CancelledError:
+                self._queue.put_nowait((body, attempt))
+                raise
+            except Exception:
+                logger.warning(
+                    "Falha ao publicar job; nova tentativa | tentativa=%s | bytes=%s",
+                    attempt,
+                    len(body),
+                    exc_info=True,
+                )
+                retry = asyncio.create_task(self._requeue_after_delay(body, attempt))
+                self._retries.add(retry)
+                retry.add_done_callback(self._retries.discard)
+            else:
+                self._pending_bytes -= len(body)
+            finally:
+                self._queue.task_done()
+
+    async def _requeue_after_delay(self, body: bytes, attempt: int) -> None:
+        # Volta ao fim da fila: os demais jobs seguem enquanto este espera.
+        delay = min(self._retry_delay * 2 ** (attempt - 1), self._max_retry_delay)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._queue.put_nowait((body, attempt + 1))
+
+    async def _drained(self) -> None:
+        # Um job em espera de nova tentativa não está na fila: join só conta
+        # quando não há mais esperas pendentes.
+        while True:
+            await self._queue.join()
+            if not self._retries:
+                return
+            await asyncio.wait(set(self._retries))
+
+    async def submit(self, body: bytes) -> None:
+        """Enfileira o job para publicação em segundo plano."""
+        if self._queue is None or self._pending_bytes + len(body) > self._max_bytes:
+            await self._publish(body)
+            return
+        self._pending_bytes += len(body)
+        self._queue.put_nowait((body, 1))
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Drena os jobs pendentes (até ``timeout`` segundos) e encerra as tarefas.
+
+        Esperas de nova tentativa são interrompidas e, junto com o que sobrar
+        na fila, ganham uma última tentativa direta antes de sair.
+        """
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._drained(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Jobs pendentes no shutdown | pendentes=%s",
+                self._queue.qsize() + len(self._retries),
+            )
+        # Cancelar a espera devolve o job à fila (finally de _requeue_after_delay).
+        pending_tasks = [*self._retries, *self._workers]
+        for task in pending_tasks:
+            task.cancel()
+        await asyncio.gather(*pending_tasks, return_exceptions=True)
+
+        lost = 0
+        while not self._queue.empty():
+            body, _ = self._queue.get_nowait()
+            try:
+                await self._publish(body)
+            except Exception:
+                lost += 1
+                logger.exception("Falha ao publicar job no shutdown | bytes=%s", len(body))
+        if lost:
+            logger.error("Jobs não publicados no shutdown | perdidos=%s", lost)
+
+        self._queue = None
+        self._workers = []
+        self._retries = set()
+        self._pending_bytes = 0
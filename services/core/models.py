@@ -1,5 +1,7 @@
 """Modelos de autenticação e persistência do núcleo de serviços."""
 
+import os
+import time
 import uuid
 from datetime import datetime
 from typing import List, Optional, Dict, Any
@@ -9,6 +11,23 @@ from sqlmodel import SQLModel, Field as SQLField, Relationship
 from sqlalchemy import Column, String, DateTime, func, ForeignKey, JSON, Index
 
 
+def new_uuid7() -> str:
+    """UUIDv7 (RFC 9562): 48 bits de epoch em ms seguidos de 74 bits aleatórios.
+
+    Chaves geradas em sequência ficam em ordem crescente, então inserções caem
+    no fim do índice da chave primária em vez de espalhar page splits como o v4.
+    """
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (
+        (time.time_ns() // 1_000_000 & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | (rand >> 68) << 64
+        | 0b10 << 62
+        | rand & 0x3FFF_FFFF_FFFF_FFFF
+    )
+    return str(uuid.UUID(int=value))
+
+
 class User(SQLModel, table=True):
     """Usuário sincronizado com o provedor de identidade."""
 
@@ -21,9 +40,16 @@ class User(SQLModel, table=True):
         default_factory=datetime.utcnow,
         sa_column=Column(DateTime(timezone=True), server_default=func.now(), nullable=False),
     )
+    # Nenhum fluxo percorre as análises a partir do usuário: lazy="raise" transforma
+    # um acesso acidental (N+1) em erro, e a exclusão fica com o ON DELETE CASCADE
+    # da FK, sem carregar os filhos na sessão. Quem precisar deles usa selectinload.
     session_analyses: List["SessionAnalysis"] = Relationship(
         back_populates="user",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan"},
+        sa_relationship_kwargs={
+            "lazy": "raise",
+            "passive_deletes": True,
+            "cascade": "save-update, merge",
+        },
     )
 
 
@@ -31,9 +57,12 @@ class SessionAnalysis(SQLModel, table=True):
     """Persistência do resultado de análise de uma sessão."""
 
     __tablename__ = "session_analyses"
-    __table_args__ = (Index("ix_session_analyses_user_id", "user_id"),)
+    # (user_id, created_at) atende tanto o filtro por dono quanto o histórico
+    # ordenado por data (varredura reversa do índice, sem sort). A busca por
+    # session_uuid usa o índice único da própria coluna.
+    __table_args__ = (Index("ix_session_analyses_user_created", "user_id", "created_at"),)
 
-    id: str = SQLField(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    id: str = SQLField(default_factory=new_uuid7, primary_key=True)
     session_uuid: str = SQLField(unique=True, index=True, max_length=36)
     user_id: str = SQLField(
         sa_column=Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -46,6 +75,8 @@ class SessionAnalysis(SQLModel, table=True):
     processing_status: str = SQLField(default="queued", max_length=32, index=True)
     processing_error: Optional[str] = SQLField(default=None, sa_column=Column(String(1024), nullable=True))
     processed_at: Optional[datetime] = SQLField(default=None, sa_column=Column(DateTime(timezone=True), nullable=True))
+    # SHA-256 dos eventos + metadados que geraram a última análise concluída.
+    content_hash: Optional[str] = SQLField(default=None, sa_column=Column(String(64), nullable=True))
     created_at: datetime = SQLField(
         default_factory=datetime.utcnow,
         sa_column=Column(DateTime(timezone=True), server_default=func.now(), nullable=False),
@@ -2,11 +2,15 @@
 Serviço de Storage para interação com o MinIO (S3 Compatible).
 Gerencia operações de leitura e escrita de arquivos no bucket S3.
 """
+import asyncio
 import json
 import logging
-from typing import Dict, Optional
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
 
 import aioboto3
+import orjson
 from botocore.exceptions import ClientError
 from fastapi import HTTPException, status
 
@@ -15,6 +19,78 @@ from config import settings
 # Configuração de logger para monitorar a integridade das operações de persistência
 logger = logging.getLogger(__name__)
 
+# Tamanho dos blocos lidos do stream do S3 ao baixar uma sessão.
+_BODY_CHUNK_SIZE = 1024 * 1024
+
+
+async def read_object_body(response: Dict[str, Any]) -> Union[bytes, bytearray]:
+    """
+    Lê o corpo de um ``get_object`` direto para um buffer pré-alocado.
+
+    ``Body.read()`` acumula os blocos recebidos e os concatena no fim, o que
+    dobra o pico de memória em sessões de centenas de MB. Com o ``ContentLength``
+    conhecido, cada bloco é copiado uma única vez para o buffer final.
+    """
+    body = response["Body"]
+    length = response.get("ContentLength")
+    if not length:
+        return await body.read()
+
+    buffer = bytearray(length)
+    view = memoryview(buffer)
+    offset = 0
+    async for chunk in body.iter_chunks(_BODY_CHUNK_SIZE):
+        end = offset + len(chunk)
+        if end > length:
+            raise ValueError(f"Objeto maior que o ContentLength informado ({length} bytes)")
+        view[offset:end] = chunk
+        offset = end
+    if offset != length:
+        raise ValueError(f"Objeto truncado: {offset} de {length} bytes recebidos")
+    return buffer
+
+
+class SessionBytesCache:
+    """
+    LRU em memória dos objetos de sessão, limitado pelo total de bytes.
+
+    As sessões são gravadas uma única vez por UUID, então um objeto lido não
+    muda depois; o TTL só limita por quanto tempo um objeto já pouco usado
+    continua ocupando memória. Objetos maiores que o limite não são cacheados.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[bytes, float]]" = OrderedDict()
+        self._size = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        content, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self.pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return content
+
+    def put(self, key: Tuple[str, str], content: bytes) -> None:
+        if len(content) > self.max_bytes:
+            return
+        self.pop(key)
+        self._entries[key] = (content, time.monotonic() + self.ttl)
+        self._size += len(content)
+        while self._size > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def pop(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[0])
+
 
 class StorageService:
     """
@@ -31,6 +107,16 @@ class StorageService:
         self.aws_secret_access_key = settings.MINIO_SECRET_KEY
         self.bucket_name = settings.MINIO_DEFAULT_BUCKETS
         self.region_name = settings.MINIO_REGION
+        self._cache = (
+            SessionBytesCache(settings.STORAGE_CACHE_MAX_BYTES, settings.STORAGE_CACHE_TTL)
+            if settings.STORAGE_CACHE_MAX_BYTES > 0
+            else None
+        )
+
+    def invalidate(self, user_id: str, session_uuid: str) -> None:
+        """Descarta a cópia em cache de uma sessão (ex.: após regravar o objeto)."""
+        if self._cache is not None:
+            self._cache.pop((user_id, session_uuid))
 
     def _get_session(self):
         """
@@ -47,24 +133,34 @@ class StorageService:
         )
         return session
 
-    async def get_session_data(self, user_id: str, session_uuid: str) -> Dict:
+    async def get_session_bytes(self, user_id: str, session_uuid: str) -> bytes:
         """
-        Recupera os dados de uma sessão específica do bucket S3.
+        Recupera o JSON bruto de uma sessão do bucket S3, sem decodificá-lo.
+
+        Útil quando os bytes seguem adiante sem inspeção (ex.: devolvidos ao
+        cliente), evitando o parse e a re-serialização do payload inteiro.
+        Leituras repetidas da mesma sessão são servidas do cache em memória.
 
         Args:
             user_id (str): ID do usuário (mapeado do claim 'sub' do JWT).
             session_uuid (str): UUID único da sessão rrweb.
 
         Returns:
-            Dict: Dados da sessão decodificados do JSON original.
+            bytes: Conteúdo do objeto exatamente como foi gravado.
 
         Raises:
             HTTPException: Se o arquivo não for encontrado (404) ou ocorrer erro crítico de storage.
         """
+        cache_key = (user_id, session_uuid)
+        if self._cache is not None:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         # Constrói o caminho hierárquico do arquivo no bucket para garantir isolamento por usuário.
         file_key = f"sessions/{user_id}/{session_uuid}.json"
 
-        logger.info(f"Tentando ler arquivo: {file_key} do bucket: {self.bucket_name}")
+        logger.debug("Tentando ler arquivo: %s do bucket: %s", file_key, self.bucket_name)
 
         session = self._get_session()
 
@@ -80,14 +176,14 @@ class StorageService:
                     Key=file_key
                 )
 
-                # Lê o stream de dados do corpo da resposta e aguarda o carregamento em memória.
-                content = await response['Body'].read()
-
-                # Decodifica os bytes (UTF-8) e reconstrói o dicionário a partir da string JSON.
-                session_data = json.loads(content.decode('utf-8'))
+                # Lê o stream do corpo em blocos para um buffer do tamanho exato do objeto.
+                # bytes imutáveis: a mesma cópia pode ser entregue a vários chamadores.
+                content = bytes(await read_object_body(response))
 
-                logger.info(f"Arquivo {file_key} lido com sucesso")
-                return session_data
+                logger.debug("Arquivo %s lido com sucesso", file_key)
+                if self._cache is not None:
+                    self._cache.put(cache_key, content)
+                return content
 
         except ClientError as e:
             # Tratamento de erros específicos da API S3 via botocore.
@@ -95,7 +191,7 @@ class StorageService:
 
             # Caso o arquivo físico não exista no diretório especificado.
             if error_code == 'NoSuchKey' or error_code == 'NotFound':
-                logger.warning(f"Arquivo não encontrado: {file_key}")
+                logger.warning("Arquivo não encontrado: %s", file_key)
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Sessão não encontrada para o usuário {user_id} e UUID {session_uuid}"
@@ -103,33 +199,54 @@ class StorageService:
 
             # Caso o bucket configurado não tenha sido previamente criado no storage.
             if error_code == 'NoSuchBucket':
-                logger.error(f"Bucket não encontrado: {self.bucket_name}")
+                logger.error("Bucket não encontrado: %s", self.bucket_name)
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Bucket de storage não configurado corretamente"
                 )
 
             # Falhas de permissão ou erros inesperados do servidor S3.
-            logger.error(f"Erro ao acessar S3/MinIO: {e}")
+            logger.error("Erro ao acessar S3/MinIO: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erro ao acessar storage: {str(e)}"
             )
 
-        except json.JSONDecodeError as e:
-            # Falha na integridade do arquivo JSON salvo no storage.
-            logger.error(f"Erro ao decodificar JSON do arquivo {file_key}: {e}")
+        except Exception as e:
+            # Fallback para qualquer outro erro (ex: timeout de conexão, DNS).
+            logger.error("Erro inesperado ao ler arquivo %s: %s", file_key, e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Erro ao processar dados da sessão: formato JSON inválido"
+                detail=f"Erro inesperado ao ler dados da sessão: {str(e)}"
             )
 
-        except Exception as e:
-            # Fallback para qualquer outro erro (ex: timeout de conexão, DNS).
-            logger.error(f"Erro inesperado ao ler arquivo {file_key}: {e}")
+    async def get_session_data(self, user_id: str, session_uuid: str) -> Dict:
+        """
+        Recupera os dados de uma sessão específica do bucket S3.
+
+        Args:
+            user_id (str): ID do usuário (mapeado do claim 'sub' do JWT).
+            session_uuid (str): UUID único da sessão rrweb.
+
+        Returns:
+            Dict: Dados da sessão decodificados do JSON original.
+
+        Raises:
+            HTTPException: Se o arquivo não for encontrado (404) ou ocorrer erro crítico de storage.
+        """
+        content = await self.get_session_bytes(user_id, session_uuid)
+
+        try:
+            # Reconstrói o dicionário direto dos bytes UTF-8, sem a cópia intermediária em str.
+            # O parse de sessões grandes é CPU-bound: roda em thread para não travar o loop.
+            return await asyncio.to_thread(orjson.loads, content)
+
+        except json.JSONDecodeError as e:
+            # Falha na integridade do arquivo JSON salvo no storage.
+            logger.error("Erro ao decodificar JSON da sessão %s: %s", session_uuid, e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Erro inesperado ao ler dados da sessão: {str(e)}"
+                detail="Erro ao processar dados da sessão: formato JSON inválido"
             )
 
 
@@ -1,9 +1,95 @@
+import joblib
 import numpy as np
-from typing import Any, List
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Union
 from sklearn.ensemble import IsolationForest
 from services.domain.models import BoundingBox, InsightEvent
 
-def detect_behavioral_anomalies(kinematics: List[Any]) -> List[InsightEvent]:
+def kinematics_to_array(kinematics: Sequence[Any]) -> np.ndarray:
+    """
+    Converte vetores cinemáticos (objetos ou dicts) numa matriz ``(n, 3)`` de inteiros
+    com as colunas ``timestamp, x, y``.
+
+    A matriz é pré-alocada e preenchida em uma única passada, sem criar modelos
+    intermediários por ponto.
+    """
+    points = np.empty((len(kinematics), 3), dtype=np.int64)
+    for row, item in enumerate(kinematics):
+        if isinstance(item, dict):
+            points[row] = (int(item["timestamp"]), int(item["x"]), int(item["y"]))
+        else:
+            points[row] = (int(item.timestamp), int(item.x), int(item.y))
+    return points
+
+def build_motion_features(kinematics: Union[Sequence[Any], np.ndarray]) -> Tuple[np.ndarray, List[List[int]]]:
+    """
+    Extrai a matriz de features ``(velocidade, delta_angular)`` de uma sessão.
+
+    Retorna também o ponto ``[timestamp, x, y]`` correspondente a cada linha, para
+    localizar as anomalias. Sessões com menos de 10 pontos não geram features.
+    """
+    # O modelo requer uma massa mínima de pontos para conseguir treinar um baseline confiável para a sessão atual.
+    if len(kinematics) < 10:
+        return np.empty((0, 2), dtype=np.float32), []
+
+    points = kinematics if isinstance(kinematics, np.ndarray) else kinematics_to_array(kinematics)
+
+    # Ordenação cronológica rigorosa para garantir que os cálculos de delta (espaço/tempo) sejam coerentes.
+    # O argsort estável preserva a ordem de empates, como o sorted() faria.
+    move_points = points[np.argsort(points[:, 0], kind="stable")]
+
+    # Deltas entre pontos consecutivos calculados em lote (colunas t, x, y).
+    deltas = np.diff(move_points, axis=0)
+    # Delta tempo em segundos para o cálculo de velocidade (pixels/segundo).
+    dt = deltas[:, 0] / 1000.0
+    dx = deltas[:, 1].astype(np.float64)
+    dy = deltas[:, 2].astype(np.float64)
+
+    # Distância euclidiana percorrida entre dois pontos consecutivos.
+    dist = np.sqrt(dx * dx + dy * dy)
+
+    # Ângulo absoluto de cada vetor de movimento (radianos).
+    angle = np.arctan2(dy, dx)
+
+    # Variação Angular (Torque): Identifica mudanças bruscas de direção (zigue-zague ou hesitação motora).
+    # O delta usa sempre o segmento imediatamente anterior, mesmo que ele seja
+    # descartado abaixo; a normalização entre -PI e +PI evita saltos artificiais de 360 graus.
+    delta_angle = np.empty_like(angle)
+    delta_angle[0] = 0.0
+    delta_angle[1:] = (angle[1:] - angle[:-1] + np.pi) % (2 * np.pi) - np.pi
+
+    # Prevenção contra divisão por zero em eventos com timestamps idênticos.
+    valid = dt > 0
+    velocity = dist[valid] / dt[valid]
+
+    # O conjunto de features foca no 'comportamento' do movimento, sendo agnóstico à posição absoluta na tela.
+    features = np.column_stack((velocity, delta_angle[valid]))
+    valid_points = move_points[1:][valid].tolist()
+
+    # O Isolation Forest converte a entrada para float32 de qualquer forma; gerar a
+    # matriz já nesse dtype evita a cópia em float64 no fit e no predict.
+    return features.astype(np.float32), valid_points
+
+@lru_cache(maxsize=4)
+def load_reference_model(path: str) -> IsolationForest:
+    """
+    Carrega (uma vez por processo) um Isolation Forest pré-treinado com ``train_iforest.py``.
+
+    ``mmap_mode='r'`` mapeia os arrays numpy do arquivo em vez de copiá-los.
+    """
+    return joblib.load(path, mmap_mode="r")
+
+def train_reference_model(feature_blocks: Iterable[np.ndarray]) -> IsolationForest:
+    """Treina o modelo de referência sobre as features de um corpus de sessões."""
+    X = np.vstack([block for block in feature_blocks if len(block)])
+    clf = IsolationForest(contamination=0.05, random_state=42)
+    clf.fit(X)
+    return clf
+
+def detect_behavioral_anomalies(
+    kinematics: Union[Sequence[Any], np.ndarray],
+    model: Optional[IsolationForest] = None,
+) -> List[InsightEvent]:
     """
     Implementa a detecção de anomalias comportamentais usando Aprendizado Não Supervisionado (Isolation Forest).
     
@@ -11,82 +97,41 @@ def detect_behavioral_anomalies(kinematics: List[Any]) -> List[InsightEvent]:
     1. Calcula Velocidade e Variação Angular (Torque) a partir de vetores cinemáticos (x, y, t).
     2. Utiliza o algoritmo Isolation Forest para isolar outliers em um espaço n-dimensional de movimento.
     3. Define 'contamination=0.05' (assume-se estatisticamente que 5% dos movimentos são anômalos).
+
+    Aceita tanto a lista de vetores quanto a matriz ``(n, 3)`` de ``kinematics_to_array``.
+    Com ``model`` (pré-treinado), a sessão só passa pelo ``predict``; sem ele,
+    um modelo é treinado sobre a própria sessão.
     """
     insights = []
 
-    # O modelo requer uma massa mínima de pontos para conseguir treinar um baseline confiável para a sessão atual.
-    if len(kinematics) < 10:
-        return insights
-
-    # Ordenação cronológica rigorosa para garantir que os cálculos de delta (espaço/tempo) sejam coerentes.
-    move_points = sorted(kinematics, key=lambda k: k.timestamp)
-
-    features = []
-    valid_points = []
-    
     # --- Passo 1: Feature Engineering (Extração de Características Dinâmicas) ---
-    # Transformamos coordenadas brutas em vetores de estado cinemático (Velocidade e Delta de Ângulo).
-    for i in range(1, len(move_points)):
-        p1, p2 = move_points[i-1], move_points[i]
-        
-        # Delta tempo em segundos para o cálculo de velocidade (pixels/segundo).
-        dt = (p2.timestamp - p1.timestamp) / 1000.0
-        # Prevenção contra divisão por zero em eventos com timestamps idênticos.
-        if dt <= 0: continue
-        
-        # Cálculo da distância euclidiana percorrida entre dois pontos consecutivos.
-        dist = calculate_distance({'x': p1.x, 'y': p1.y}, {'x': p2.x, 'y': p2.y})
-        velocity = dist / dt
-        
-        # Ângulo absoluto do vetor de movimento atual (radianos).
-        angle = calculate_angle({'x': p1.x, 'y': p1.y}, {'x': p2.x, 'y': p2.y})
-        
-        # Variação Angular (Torque): Identifica mudanças bruscas de direção (zigue-zague ou hesitação motora).
-        if i > 1:
-            p0 = move_points[i-2]
-            prev_angle = calculate_angle({'x': p0.x, 'y': p0.y}, {'x': p1.x, 'y': p1.y})
-            # Normalização do delta de ângulo entre -PI e +PI para evitar saltos artificiais de 360 graus.
-            delta_angle = (angle - prev_angle + np.pi) % (2 * np.pi) - np.pi
-        else:
-            delta_angle = 0.0
-            
-        # O conjunto de features foca no 'comportamento' do movimento, sendo agnóstico à posição absoluta na tela.
-        features.append([velocity, delta_angle])
-        valid_points.append(p2)
-
-    if not features: return insights
+    X, valid_points = build_motion_features(kinematics)
 
     # --- Passo 2: Detecção de Outliers (Isolation Forest) ---
     # O algoritmo Isolation Forest isola observações selecionando aleatoriamente uma feature e um valor de corte.
     # Outliers tendem a ser isolados em menos partições (caminhos mais curtos na árvore).
-    X = np.array(features)
     if X.shape[0] < 2: return insights
 
-    # Treinamos o modelo com os dados da própria sessão para identificar o que foge do padrão daquele usuário específico.
-    clf = IsolationForest(contamination=0.05, random_state=42)
     # Predição: 1 para dados normais, -1 para anomalias detectadas.
-    preds = clf.fit_predict(X)
+    if model is not None:
+        # O modelo de referência já conhece o padrão de movimento do corpus: só prediz.
+        preds = model.predict(X)
+    else:
+        # Treinamos o modelo com os dados da própria sessão para identificar o que foge do padrão daquele usuário específico.
+        clf = IsolationForest(contamination=0.05, random_state=42)
+        preds = clf.fit_predict(X)
 
     # --- Passo 3: Conversão de Outliers em Insights de Usabilidade ---
-    for idx, pred in enumerate(preds):
-        if pred == -1:
-            p = valid_points[idx]
-            # Registra o evento anômalo para destaque visual no replay da sessão.
-            insights.append(InsightEvent(
-                timestamp=p.timestamp,
-                type='usability',
-                severity='medium',
-                message='Erratic Movement Detected (AI)',
-                # Define uma área de 50x50 pixels ao redor do ponto anômalo para foco visual.
-                boundingBox=BoundingBox(top=p.y-25, left=p.x-25, width=50, height=50),
-                algorithm="IsolationForest"
-            ))
+    for idx in np.flatnonzero(preds == -1).tolist():
+        timestamp, x, y = valid_points[idx]
+        # Registra o evento anômalo para destaque visual no replay da sessão.
+        insights.append(InsightEvent(
+            timestamp=timestamp,
+            type='usability',
+            severity='medium',
+            message='Erratic Movement Detected (AI)',
+            # Define uma área de 50x50 pixels ao redor do ponto anômalo para foco visual.
+            boundingBox=BoundingBox(top=y-25, left=x-25, width=50, height=50),
+            algorithm="IsolationForest"
+        ))
     return insights
-
-def calculate_distance(p1: dict, p2: dict) -> float:
-    """Calcula a distância euclidiana padrão entre dois pontos (x, y) em um plano 2D."""
-    return ((p1['x'] - p2['x'])**2 + (p1['y'] - p2['y'])**2)**0.5
-
-def calculate_angle(p1: dict, p2: dict) -> float:
-    """Calcula o ângulo em radianos entre dois pontos usando atan2 para cobrir todos os quadrantes do plano cartesiano."""
-    return np.arctan2(p2['y'] - p1['y'], p2['x'] - p1['x'])
@@ -103,6 +103,11 @@ def clamp_confidence(value: float) -> float:
     return max(0.0, min(1.0, float(value)))
 
 
+def match_sort_key(match: HeuristicMatch) -> Tuple[int, str]:
+    """Ordem canônica dos matches: início da janela e, em empate, o nome."""
+    return (match.start_ts or 0, match.heuristic_name)
+
+
 def ordered_actions(ctx: HeuristicContext) -> List[Any]:
     return sorted(ctx.actions or [], key=action_timestamp)
 
@@ -16,31 +16,49 @@ from __future__ import annotations
 
 from collections import Counter, defaultdict
 from math import pi
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
 
 import numpy as np
 
-from services.domain.ml_analyzer import detect_behavioral_anomalies
-from services.heuristics.base import clamp_confidence, distance, direction, make_match
+from services.domain.ml_analyzer import detect_behavioral_anomalies, kinematics_to_array, load_reference_model
+from services.heuristics.base import clamp_confidence, distance, make_match, match_sort_key
 from services.heuristics.types import HeuristicContext, HeuristicMatch
-from services.session_processing.models import KinematicVector
+
+T = TypeVar("T")
+
+
+def _derived(ctx: HeuristicContext, key: str, build: Callable[[HeuristicContext], T]) -> T:
+    """Memoiza no contexto uma visão derivada usada por vários detectores.
+
+    Os detectores apenas leem essas listas; nenhuma delas é mutada.
+    """
+
+    if key not in ctx.derived:
+        ctx.derived[key] = build(ctx)
+    return ctx.derived[key]
+
+
+def _build_ordered_actions(ctx: HeuristicContext) -> List[Any]:
+    return sorted(ctx.actions or [], key=lambda item: int(getattr(item, "timestamp", getattr(item, "t", 0)) or 0))
 
 
 def _ordered_actions(ctx: HeuristicContext) -> List[Any]:
     """Ordena interações canônicas pelo timestamp consolidado."""
 
-    return sorted(ctx.actions or [], key=lambda item: int(getattr(item, "timestamp", getattr(item, "t", 0)) or 0))
+    return _derived(ctx, "ordered_actions", _build_ordered_actions)
+
+
+def _build_ordered_raw_actions(ctx: HeuristicContext) -> List[Any]:
+    return sorted(ctx.raw_actions or [], key=lambda item: int(getattr(item, "timestamp", 0) or 0))
 
 
 def _ordered_raw_actions(ctx: HeuristicContext) -> List[Any]:
     """Ordena ações técnicas cruas preservadas pelo pré-processamento neutro."""
 
-    return sorted(ctx.raw_actions or [], key=lambda item: int(getattr(item, "timestamp", 0) or 0))
-
+    return _derived(ctx, "ordered_raw_actions", _build_ordered_raw_actions)
 
-def _ordered_kinematics(ctx: HeuristicContext) -> List[Dict[str, Any]]:
-    """Normaliza vetores cinemáticos para cálculos geométricos e ML."""
 
+def _build_ordered_kinematics(ctx: HeuristicContext) -> List[Dict[str, Any]]:
     points: List[Dict[str, Any]] = []
     for item in ctx.kinematics or []:
         timestamp = getattr(item, "timestamp", None)
@@ -56,12 +74,95 @@ def _ordered_kinematics(ctx: HeuristicContext) -> List[Dict[str, Any]]:
     return sorted(points, key=lambda item: item["timestamp"])
 
 
+def _ordered_kinematics(ctx: HeuristicContext) -> List[Dict[str, Any]]:
+    """Normaliza vetores cinemáticos para cálculos geométricos e ML."""
+
+    return _derived(ctx, "ordered_kinematics", _build_ordered_kinematics)
+
+
+def _build_kinematic_array(ctx: HeuristicContext) -> np.ndarray:
+    return kinematics_to_array(_ordered_kinematics(ctx))
+
+
+def _kinematic_array(ctx: HeuristicContext) -> np.ndarray:
+    """Matriz ``(n, 3)`` de ``timestamp, x, y`` consumida pelo Isolation Forest."""
+
+    return _derived(ctx, "kinematic_array", _build_kinematic_array)
+
+
+def _build_kinematic_columns(ctx: HeuristicContext) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    kinematics = _ordered_kinematics(ctx)
+    count = len(kinematics)
+    timestamps = np.fromiter((point["timestamp"] for point in kinematics), dtype=np.int64, count=count)
+    xs = np.fromiter((point["x"] for point in kinematics), dtype=np.float64, count=count)
+    ys = np.fromiter((point["y"] for point in kinematics), dtype=np.float64, count=count)
+    return timestamps, xs, ys
+
+
+def _kinematic_columns(ctx: HeuristicContext) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Colunas ``timestamp, x, y`` da cinemática ordenada, sem truncar as coordenadas."""
+
+    return _derived(ctx, "kinematic_columns", _build_kinematic_columns)
+
+
+# Visões derivadas que dependem só da cinemática da sessão.
+_KINEMATIC_DERIVED_KEYS = ("ordered_kinematics", "kinematic_array", "kinematic_columns")
+
+
+def inherit_kinematic_views(target: HeuristicContext, source: HeuristicContext) -> None:
+    """Reaproveita em `target` as visões cinemáticas já montadas em `source`.
+
+    O pipeline roda os detectores cinemáticos num contexto próprio, em paralelo
+    à fase 1; sem isso o contexto comportamental reordenaria e reconverteria
+    toda a cinemática de novo. Ambos precisam descrever a mesma sessão.
+    """
+
+    for key in _KINEMATIC_DERIVED_KEYS:
+        if key in source.derived and key not in target.derived:
+            target.derived[key] = source.derived[key]
+
+
 def _cfg(ctx: HeuristicContext, key: str, default: Any) -> Any:
     """Lê thresholds configuráveis sem acoplar os detectores a settings globais."""
 
     return (ctx.config or {}).get(key, default)
 
 
+def _window_ends(timestamps: np.ndarray, window_ms: int) -> np.ndarray:
+    """Para cada ponto ``i``, o primeiro índice ``j > i`` com ``ts[j] - ts[i] > window_ms``."""
+
+    ends = np.searchsorted(timestamps, timestamps + window_ms, side="right")
+    return np.maximum(ends, np.arange(1, len(timestamps) + 1))
+
+
+def _window_spans(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Amplitude ``max - min`` de ``values[starts[i]:ends[i]]`` para todas as janelas.
+
+    Tabela esparsa de mínimos/máximos: cada nível ``k`` cobre blocos de ``2**k``
+    pontos e toda janela é a união de dois blocos do mesmo nível. Custa
+    O(n log w) em lote, em vez de varrer cada janela sobreposta.
+    """
+
+    spans = np.zeros(len(starts), dtype=np.float64)
+    if not len(starts):
+        return spans
+    # frexp devolve o expoente e com 2**(e-1) <= largura < 2**e.
+    levels = np.frexp((ends - starts).astype(np.float64))[1] - 1
+    highs = lows = values
+    for level in range(int(levels.max()) + 1):
+        if level:
+            half = 1 << (level - 1)
+            highs = np.maximum(highs[:-half], highs[half:])
+            lows = np.minimum(lows[:-half], lows[half:])
+        selected = np.flatnonzero(levels == level)
+        if not len(selected):
+            continue
+        first = starts[selected]
+        second = ends[selected] - (1 << level)
+        spans[selected] = np.maximum(highs[first], highs[second]) - np.minimum(lows[first], lows[second])
+    return spans
+
+
 def detect_local_hesitation(ctx: HeuristicContext) -> List[HeuristicMatch]:
     """Detecta pausas reais entre interações canônicas da mesma unidade semântica."""
 
@@ -286,37 +387,42 @@ def detect_hover_prolonged(ctx: HeuristicContext) -> List[HeuristicMatch]:
 
     max_ms = int(_cfg(ctx, "HOVER_PROLONGED_MS", 1500))
     max_span_px = int(_cfg(ctx, "hover_prolonged_span_px", 12))
+    # Janelas e amplitudes de todos os pontos de partida calculadas em lote; o
+    # laço abaixo só percorre as janelas candidatas, na mesma ordem gulosa.
+    timestamps, xs_all, ys_all = _kinematic_columns(ctx)
+    starts = np.arange(len(kinematics) - 1)
+    ends = _window_ends(timestamps, max_ms)[:-1]
+    fits = (
+        (ends - starts >= 2)
+        & (_window_spans(xs_all, starts, ends) <= max_span_px)
+        & (_window_spans(ys_all, starts, ends) <= max_span_px)
+    )
     matches: List[HeuristicMatch] = []
-    start_idx = 0
+    next_start = 0
 
-    while start_idx < len(kinematics) - 1:
-        start = kinematics[start_idx]
-        end_idx = start_idx + 1
-        while end_idx < len(kinematics) and kinematics[end_idx]["timestamp"] - start["timestamp"] <= max_ms:
-            end_idx += 1
+    for start_idx in np.flatnonzero(fits).tolist():
+        if start_idx < next_start:
+            continue
+        end_idx = int(ends[start_idx])
         window = kinematics[start_idx:end_idx]
-        if len(window) >= 2:
-            xs = [point["x"] for point in window]
-            ys = [point["y"] for point in window]
-            if max(xs) - min(xs) <= max_span_px and max(ys) - min(ys) <= max_span_px:
-                matches.append(
-                    make_match(
-                        "hover_prolonged",
-                        "evidence",
-                        confidence=0.61,
-                        start_ts=window[0]["timestamp"],
-                        end_ts=window[-1]["timestamp"],
-                        target_ref=f"cursor@{int(sum(xs)/len(xs))},{int(sum(ys)/len(ys))}",
-                        evidence={
-                            "duration_ms": window[-1]["timestamp"] - window[0]["timestamp"],
-                            "x_span": max(xs) - min(xs),
-                            "y_span": max(ys) - min(ys),
-                        },
-                    )
-                )
-                start_idx = end_idx
-                continue
-        start_idx += 1
+        xs = [point["x"] for point in window]
+        ys = [point["y"] for point in window]
+        matches.append(
+            make_match(
+                "hover_prolonged",
+                "evidence",
+                confidence=0.61,
+                start_ts=window[0]["timestamp"],
+                end_ts=window[-1]["timestamp"],
+                target_ref=f"cursor@{int(sum(xs)/len(xs))},{int(sum(ys)/len(ys))}",
+                evidence={
+                    "duration_ms": window[-1]["timestamp"] - window[0]["timestamp"],
+                    "x_span": max(xs) - min(xs),
+                    "y_span": max(ys) - min(ys),
+                },
+            )
+        )
+        next_start = end_idx
     return matches
 
 
@@ -329,42 +435,49 @@ def detect_visual_search_burst(ctx: HeuristicContext) -> List[HeuristicMatch]:
 
     min_moves = int(_cfg(ctx, "VISUAL_SEARCH_MOUSE_MOVES_MIN", 20))
     window_ms = int(_cfg(ctx, "BURST_WINDOW_MS", 5000))
-    action_times = [
-        int(getattr(action, "timestamp", 0))
-        for action in _ordered_actions(ctx)
-        if getattr(action, "interaction_type", "") not in {"navigation", "scroll"}
-    ]
+    action_times = np.sort(
+        np.array(
+            [
+                int(getattr(action, "timestamp", 0))
+                for action in _ordered_actions(ctx)
+                if getattr(action, "interaction_type", "") not in {"navigation", "scroll"}
+            ],
+            dtype=np.int64,
+        )
+    )
+    timestamps = _kinematic_columns(ctx)[0]
+    starts = np.arange(len(kinematics))
+    ends = _window_ends(timestamps, window_ms)
+    # Ações dentro de [início, último ponto] de cada janela, por busca binária.
+    actions_per_window = np.searchsorted(action_times, timestamps[ends - 1], side="right") - np.searchsorted(
+        action_times, timestamps, side="left"
+    )
+    candidates = (ends - starts >= min_moves) & (actions_per_window <= 1)
     matches: List[HeuristicMatch] = []
-    idx = 0
+    next_start = 0
 
-    while idx < len(kinematics):
-        start = kinematics[idx]
-        end_idx = idx + 1
-        while end_idx < len(kinematics) and kinematics[end_idx]["timestamp"] - start["timestamp"] <= window_ms:
-            end_idx += 1
+    for idx in np.flatnonzero(candidates).tolist():
+        if idx < next_start:
+            continue
+        end_idx = int(ends[idx])
         window = kinematics[idx:end_idx]
-        if len(window) >= min_moves:
-            actions_in_window = sum(1 for ts in action_times if start["timestamp"] <= ts <= window[-1]["timestamp"])
-            if actions_in_window <= 1:
-                matches.append(
-                    make_match(
-                        "visual_search_burst",
-                        "evidence",
-                        confidence=0.56,
-                        start_ts=start["timestamp"],
-                        end_ts=window[-1]["timestamp"],
-                        target_ref=None,
-                        evidence={
-                            "mouse_moves": len(window),
-                            "actions": actions_in_window,
-                            "x_span": max(point["x"] for point in window) - min(point["x"] for point in window),
-                            "y_span": max(point["y"] for point in window) - min(point["y"] for point in window),
-                        },
-                    )
-                )
-                idx = end_idx
-                continue
-        idx += 1
+        matches.append(
+            make_match(
+                "visual_search_burst",
+                "evidence",
+                confidence=0.56,
+                start_ts=window[0]["timestamp"],
+                end_ts=window[-1]["timestamp"],
+                target_ref=None,
+                evidence={
+                    "mouse_moves": len(window),
+                    "actions": int(actions_per_window[idx]),
+                    "x_span": max(point["x"] for point in window) - min(point["x"] for point in window),
+                    "y_span": max(point["y"] for point in window) - min(point["y"] for point in window),
+                },
+            )
+        )
+        next_start = end_idx
     return matches
 
 
@@ -375,21 +488,16 @@ def detect_erratic_motion(ctx: HeuristicContext) -> List[HeuristicMatch]:
     if len(kinematics) < 8:
         return []
 
-    points = [(point["x"], point["y"]) for point in kinematics]
-    total_distance = 0.0
-    angles: List[float] = []
-    direction_changes = 0
-    for idx in range(1, len(points)):
-        total_distance += distance(points[idx - 1], points[idx])
-        angles.append(direction(points[idx - 1], points[idx]))
-        if idx >= 2:
-            delta = abs(((angles[-1] - angles[-2] + pi) % (2 * pi)) - pi)
-            if delta > 1.1:
-                direction_changes += 1
-
-    net_distance = distance(points[0], points[-1])
+    # Segmentos, ângulos e viradas calculados em lote sobre a trajetória inteira.
+    points = np.array([(point["x"], point["y"]) for point in kinematics], dtype=np.float64)
+    steps = np.diff(points, axis=0)
+    total_distance = float(np.hypot(steps[:, 0], steps[:, 1]).sum())
+    angle_steps = np.diff(np.arctan2(steps[:, 1], steps[:, 0]))
+    direction_changes = int(np.count_nonzero(np.abs(((angle_steps + pi) % (2 * pi)) - pi) > 1.1))
+
+    net_distance = float(np.hypot(*(points[-1] - points[0])))
     efficiency = net_distance / total_distance if total_distance > 0 else 1.0
-    angle_variance = float(np.var(np.diff(angles))) if len(angles) > 1 else 0.0
+    angle_variance = float(np.var(angle_steps))
     direction_changes_min = int(_cfg(ctx, "ERRATIC_MOTION_DIRECTION_CHANGES_MIN", 6))
     efficiency_max = float(_cfg(ctx, "ERRATIC_MOTION_PATH_EFFICIENCY_MAX", 0.45))
     if direction_changes < direction_changes_min and efficiency > efficiency_max:
@@ -417,12 +525,10 @@ def detect_erratic_motion(ctx: HeuristicContext) -> List[HeuristicMatch]:
 def detect_ml_erratic_motion(ctx: HeuristicContext) -> List[HeuristicMatch]:
     """Mantém a heurística baseada em ML operando sobre a cinemática neutra."""
 
-    kinematics = [
-        KinematicVector(timestamp=point["timestamp"], x=int(point["x"]), y=int(point["y"]))
-        for point in _ordered_kinematics(ctx)
-    ]
+    model_path = ctx.config.get("ML_IFOREST_MODEL_PATH")
+    model = load_reference_model(model_path) if model_path else None
     matches: List[HeuristicMatch] = []
-    for insight in detect_behavioral_anomalies(kinematics):
+    for insight in detect_behavioral_anomalies(_kinematic_array(ctx), model=model):
         bounding_box = insight.boundingBox
         evidence = {"algorithm": insight.algorithm, "message": insight.message}
         if bounding_box is not None:
@@ -441,10 +547,14 @@ def detect_ml_erratic_motion(ctx: HeuristicContext) -> List[HeuristicMatch]:
     return matches
 
 
+def _build_raw_clicks(ctx: HeuristicContext) -> List[Any]:
+    return [item for item in _ordered_raw_actions(ctx) if getattr(item, "action_type", "") == "click"]
+
+
 def _raw_clicks(ctx: HeuristicContext) -> List[Any]:
     """Seleciona somente cliques crus para heurísticas técnicas locais."""
 
-    return [item for item in _ordered_raw_actions(ctx) if getattr(item, "action_type", "") == "click"]
+    return _derived(ctx, "raw_clicks", _build_raw_clicks)
 
 
 def detect_rage_click(ctx: HeuristicContext) -> List[HeuristicMatch]:
@@ -578,6 +688,14 @@ def detect_repeated_toggle(ctx: HeuristicContext) -> List[HeuristicMatch]:
     return matches
 
 
+# Detectores que leem apenas a cinemática (e config). Não dependem das
+# interações canônicas da fase 1, então podem rodar antes/em paralelo a ela.
+KINEMATIC_HEURISTICS = [
+    detect_hover_prolonged,
+    detect_erratic_motion,
+    detect_ml_erratic_motion,
+]
+
 BEHAVIORAL_HEURISTICS = [
     detect_local_hesitation,
     detect_real_response_change,
@@ -597,10 +715,31 @@ BEHAVIORAL_HEURISTICS = [
 ]
 
 
-def detect_behavioral_heuristics(ctx: HeuristicContext) -> List[HeuristicMatch]:
-    """Executa o conjunto comportamental completo sobre a arquitetura atual."""
+def detect_kinematic_heuristics(ctx: HeuristicContext) -> List[HeuristicMatch]:
+    """Executa só os detectores cinemáticos (incluindo o Isolation Forest)."""
 
     matches: List[HeuristicMatch] = []
-    for detector in BEHAVIORAL_HEURISTICS:
+    for detector in KINEMATIC_HEURISTICS:
         matches.extend(detector(ctx))
-    return sorted(matches, key=lambda item: (item.start_ts or 0, item.heuristic_name))
+    return matches
+
+
+def detect_behavioral_heuristics(
+    ctx: HeuristicContext,
+    kinematic_matches: Optional[List[HeuristicMatch]] = None,
+) -> List[HeuristicMatch]:
+    """Executa o conjunto comportamental completo sobre a arquitetura atual.
+
+    Se `kinematic_matches` vier pré-calculado, os detectores cinemáticos não
+    são executados de novo e seus resultados são reaproveitados.
+    """
+
+    matches: List[HeuristicMatch] = []
+    detectors = BEHAVIORAL_HEURISTICS
+    if kinematic_matches is not None:
+        matches.extend(kinematic_matches)
+        detectors = [detector for detector in BEHAVIORAL_HEURISTICS if detector not in KINEMATIC_HEURISTICS]
+    for detector in detectors:
+        matches.extend(detector(ctx))
+    matches.sort(key=match_sort_key)
+    return matches
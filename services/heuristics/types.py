@@ -28,6 +28,9 @@ class HeuristicContext:
     page_context: Optional[Dict[str, Any]]
     raw_actions: List[Any] = field(default_factory=list)
     config: Dict[str, Any] = field(default_factory=dict)
+    # Visões derivadas (listas ordenadas/normalizadas) calculadas uma única vez
+    # e compartilhadas entre os detectores que rodam sobre o mesmo contexto.
+    derived: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
 
 
 @dataclass(frozen=True)
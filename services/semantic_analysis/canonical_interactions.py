@@ -10,7 +10,10 @@ from __future__ import annotations
 import uuid
 from typing import Any, Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+# Namespace fixo para os ids determinísticos de interação (uuid5).
+_INTERACTION_NAMESPACE = uuid.UUID("6f1c3f0e-5d2a-4b8e-9a57-3c1e2b7d9f40")
 
 
 class ResolvedElement(BaseModel):
@@ -35,7 +38,7 @@ class CanonicalInteraction(BaseModel):
     observável, com links rastreáveis para os eventos rrweb de origem.
     """
 
-    interaction_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    interaction_id: str = ""
     interaction_type: Literal[
         "button_submit",
         "checkbox_selection",
@@ -60,6 +63,25 @@ class CanonicalInteraction(BaseModel):
     notes: List[str] = Field(default_factory=list)
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
+    @model_validator(mode="after")
+    def derive_interaction_id(self) -> "CanonicalInteraction":
+        # O id deriva do conteúdo da interação: reprocessar a mesma sessão gera o
+        # mesmo bundle byte a byte, e o cache de respostas do LLM volta a acertar.
+        if not self.interaction_id:
+            key = "|".join(
+                str(part)
+                for part in (
+                    self.interaction_type,
+                    self.timestamp,
+                    self.element_id,
+                    self.question_id,
+                    self.value,
+                    ",".join(map(str, self.source_event_indexes)),
+                )
+            )
+            self.interaction_id = str(uuid.uuid5(_INTERACTION_NAMESPACE, key))
+        return self
+
 
 class PlanExecutionResult(BaseModel):
     """Resultado do executor determinístico baseado no plano da fase 1."""
@@ -12,10 +12,11 @@ heurístico antigo.
 
 from __future__ import annotations
 
-from typing import List
+import heapq
+from typing import List, Optional
 
-from services.heuristics.base import make_match
-from services.heuristics.behavioral import detect_behavioral_heuristics
+from services.heuristics.base import make_match, match_sort_key
+from services.heuristics.behavioral import detect_behavioral_heuristics, inherit_kinematic_views
 from services.heuristics.types import HeuristicContext, HeuristicMatch
 from services.session_processing.models import ProcessedSession
 from services.semantic_analysis.canonical_interactions import CanonicalInteraction
@@ -46,8 +47,15 @@ def detect_heuristics(
     interactions: List[CanonicalInteraction],
     processed_session: ProcessedSession,
     config: dict,
+    kinematic_matches: Optional[List[HeuristicMatch]] = None,
+    kinematic_ctx: Optional[HeuristicContext] = None,
 ) -> List[HeuristicMatch]:
-    """Orquestra heurísticas estruturais e comportamentais no fluxo atual."""
+    """Orquestra heurísticas estruturais e comportamentais no fluxo atual.
+
+    `kinematic_matches` permite reaproveitar os detectores cinemáticos já
+    executados em paralelo à fase 1; `kinematic_ctx` (o contexto em que eles
+    rodaram) empresta a cinemática já ordenada aos detectores restantes.
+    """
 
     behavior_ctx = HeuristicContext(
         actions=interactions,
@@ -57,8 +65,11 @@ def detect_heuristics(
         raw_actions=processed_session.raw_actions,
         config=config,
     )
+    if kinematic_ctx is not None:
+        inherit_kinematic_views(behavior_ctx, kinematic_ctx)
 
-    matches = []
-    matches.extend(_structural_matches(plan))
-    matches.extend(detect_behavioral_heuristics(behavior_ctx))
-    return sorted(matches, key=lambda item: (item.start_ts or 0, item.heuristic_name))
+    # Os comportamentais já chegam ordenados; basta ordenar a lista estrutural
+    # (pequena) e intercalar as duas em O(n), preservando a ordem estável.
+    structural = sorted(_structural_matches(plan), key=match_sort_key)
+    behavioral = detect_behavioral_heuristics(behavior_ctx, kinematic_matches)
+    return list(heapq.merge(structural, behavioral, key=match_sort_key))
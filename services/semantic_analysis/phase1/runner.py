@@ -301,6 +301,8 @@ def _fallback_phase1_plan(processed: ProcessedSession) -> Phase1ExtractionPlan:
 async def run_phase1_extraction_plan(
     processed: ProcessedSession,
     extension_metadata: Optional[Dict[str, Any]] = None,
+    *,
+    use_llm: bool = True,
 ) -> tuple[Phase1ExtractionPlan, Dict[str, Any]]:
     """
     Executa o agente estrutural para definir o plano de extração semântica.
@@ -308,10 +310,14 @@ async def run_phase1_extraction_plan(
     Este passo transforma a visão bruta da página em um modelo conceitual:
     Onde estão os formulários? Quais botões são críticos? Como agrupar campos?
     O plano resultante guia o executor determinístico no mapeamento final.
+    Com ``use_llm=False`` (sessão sem ações suficientes) o agente não é chamado.
     """
 
+    if not use_llm:
+        return _fallback_phase1_plan(processed), {"backend": "deterministic", "status": "skipped", "reason": "insufficient_user_actions"}
+
     payload = _payload_from_processed(processed, extension_metadata=extension_metadata)
-    payload_json = json.dumps(payload, ensure_ascii=False)
+    payload_json = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
     try:
         plan = await request_phase1_plan(payload_json)
         return plan, {"backend": "structured_llm", "status": "ok"}
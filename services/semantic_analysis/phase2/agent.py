@@ -10,13 +10,15 @@ from services.semantic_analysis.structured_llm import structured_llm_call
 async def request_final_analysis(payload_json: str, correction_prompt: str | None = None) -> StructuredSessionAnalysis:
     """Produz a análise final estruturada via JSON Schema nativo."""
 
+    # Prefixo estável (system, developer, payload) primeiro: o retry com
+    # correção reaproveita o cache de prompt do provedor da primeira chamada.
     messages = [
         {"role": "system", "content": FINAL_ANALYSIS_SYSTEM_PROMPT},
         {"role": "developer", "content": FINAL_ANALYSIS_DEVELOPER_PROMPT},
+        {"role": "user", "content": payload_json},
     ]
     if correction_prompt:
         messages.append({"role": "developer", "content": correction_prompt})
-    messages.append({"role": "user", "content": payload_json})
 
     return await structured_llm_call(
         model_class=StructuredSessionAnalysis,
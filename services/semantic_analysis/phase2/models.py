@@ -97,6 +97,20 @@ class StructuredSessionAnalysis(BaseModel):
         return self
 
 
+class DeterministicSessionAnalysis(StructuredSessionAnalysis):
+    """
+    Análise produzida sem o agente final (sessão sem ações ou falha do LLM).
+
+    Os mínimos do contrato do LLM (dois padrões, três evidências) existem para
+    obrigar o agente a justificar a leitura. O caminho determinístico só
+    descreve o que o bundle contém e, em sessões quase vazias, não há material
+    para tanto; aqui basta um item de cada.
+    """
+
+    behavioral_patterns: List[InsightItem] = Field(..., min_length=1)
+    evidence_used: List[str] = Field(..., min_length=1)
+
+
 class AnalysisResult(BaseModel):
     """Envelope persistido pelo job de processamento."""
 
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import Any
 
-from services.semantic_analysis.phase2.models import GoalHypothesis, InsightItem, SessionHypothesis, StructuredSessionAnalysis
+from services.semantic_analysis.phase2.models import DeterministicSessionAnalysis, GoalHypothesis, InsightItem, SessionHypothesis, StructuredSessionAnalysis
 from services.semantic_analysis.phase2.evidence import build_compact_evidence_from_bundle, compact_evidence_used
 from services.semantic_analysis.phase2.quality import is_bad_text, normalize_text
 from services.semantic_analysis.semantic_bundle import SemanticSessionBundle
@@ -332,8 +332,15 @@ def repair_bad_descriptions(
 def repair_analysis_with_bundle(
     analysis: StructuredSessionAnalysis,
     bundle: SemanticSessionBundle,
+    *,
+    deterministic: bool = False,
 ) -> StructuredSessionAnalysis:
-    """Completa campos vazios sem criar evidências fora do bundle."""
+    """
+    Completa campos vazios sem criar evidências fora do bundle.
+
+    Com ``deterministic=True`` o resultado segue ``DeterministicSessionAnalysis``,
+    que aceita sessões com menos padrões e evidências do que o contrato do LLM.
+    """
 
     evidence = compact_evidence_used(list(getattr(analysis, "evidence_used", []) or []))
     bundle_evidence = build_compact_evidence_from_bundle(bundle)
@@ -387,7 +394,8 @@ def repair_analysis_with_bundle(
             )
         ]
 
-    return StructuredSessionAnalysis(
+    analysis_model = DeterministicSessionAnalysis if deterministic else StructuredSessionAnalysis
+    return analysis_model(
         session_narrative=(
             getattr(analysis, "session_narrative", "")
             if not is_bad_text(getattr(analysis, "session_narrative", ""), min_chars=120)
@@ -6,7 +6,6 @@ determinística em caso de falha no LLM.
 
 from __future__ import annotations
 
-import json
 from typing import Any, Dict
 
 from services.semantic_analysis.phase2.agent import request_final_analysis
@@ -83,7 +82,7 @@ def _fallback_final_analysis(bundle: SemanticSessionBundle, error_message: str =
     progress_signals = []
     if submit_count:
         progress_signals.append(
-            InsightItem(
+            InsightItem.model_construct(
                 label="submission_attempt",
                 description="A sessão contém pelo menos uma ação canônica de submissão após consolidação estrutural.",
                 confidence=0.74,
@@ -91,7 +90,10 @@ def _fallback_final_analysis(bundle: SemanticSessionBundle, error_message: str =
             )
         )
 
-    analysis = StructuredSessionAnalysis(
+    # Rascunho sem validação (itens incluídos): o repair abaixo completa
+    # narrativa e evidências a partir do bundle e devolve a análise validada
+    # pelo contrato determinístico.
+    analysis = StructuredSessionAnalysis.model_construct(
         session_narrative=(
             f"A sessão é compatível com a meta de {page_goal}. "
             f"O fluxo consolidado contém {len(bundle.canonical_interactions)} interações canônicas em {len(bundle.segments)} segmentos."
@@ -102,15 +104,15 @@ def _fallback_final_analysis(bundle: SemanticSessionBundle, error_message: str =
             justification="Inferido a partir do contexto de página da fase 1 e do fluxo canônico consolidado.",
         ),
         behavioral_patterns=[
-            InsightItem(
+            InsightItem.model_construct(
                 label="structured_form_progress",
                 description="As interações seguem um fluxo semântico consolidado em vez de eventos DOM brutos.",
                 confidence=0.7,
                 supporting_evidence=evidence_used[:3],
-            )
+            ),
         ],
         friction_points=[
-            InsightItem(
+            InsightItem.model_construct(
                 label="interaction_friction_signal",
                 description="Há sinais locais ou globais de pausa, mudança ou fragmentação após a consolidação canônica.",
                 confidence=0.58,
@@ -128,7 +130,7 @@ def _fallback_final_analysis(bundle: SemanticSessionBundle, error_message: str =
             )
         ] if error_message else [],
         hypotheses=[
-            SessionHypothesis(
+            SessionHypothesis.model_construct(
                 statement=f"O usuário provavelmente estava tentando {page_goal}.",
                 confidence=0.65 if bundle.canonical_interactions else 0.2,
                 type="goal",
@@ -139,7 +141,7 @@ def _fallback_final_analysis(bundle: SemanticSessionBundle, error_message: str =
         evidence_used=compact_evidence_used(evidence_used),
         overall_confidence=0.62 if bundle.canonical_interactions else 0.2,
     )
-    analysis = repair_analysis_with_bundle(analysis, bundle)
+    analysis = repair_analysis_with_bundle(analysis, bundle, deterministic=True)
     quality = score_analysis_quality(analysis)
     return AnalysisResult(
         status="ok" if not error_message else "fallback",
@@ -158,10 +160,20 @@ def _fallback_final_analysis(bundle: SemanticSessionBundle, error_message: str =
     )
 
 
-async def generate_final_session_analysis(bundle: SemanticSessionBundle) -> AnalysisResult:
+async def generate_final_session_analysis(bundle: SemanticSessionBundle, *, use_llm: bool = True) -> AnalysisResult:
     """Executa o agente final sobre o bundle limpo e validado do pipeline."""
 
-    payload_json = json.dumps(bundle.model_dump(mode="json"), ensure_ascii=False)
+    # Sessões degeneradas (sem ações do usuário) não justificam a chamada ao LLM:
+    # a análise determinística já descreve tudo o que há no bundle.
+    if not use_llm:
+        result = _fallback_final_analysis(bundle)
+        result.pipeline_trace["skipped_reason"] = "insufficient_user_actions"
+        return result
+
+    # O payload vai compacto: sem espaços entre separadores, sem campos nulos e
+    # sem o ``pipeline_trace`` (diagnóstico interno que o prompt não consome).
+    # Cada byte aqui vira token de entrada, e em sessões longas isso pesa.
+    payload_json = bundle.model_dump_json(exclude_none=True, exclude={"pipeline_trace"})
 
     try:
         response = await request_final_analysis(payload_json)
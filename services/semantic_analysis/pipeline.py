@@ -7,9 +7,12 @@ do pré-processamento neutro, do plano da fase 1 e da execução determinística
 
 from __future__ import annotations
 
+import asyncio
 from typing import Any, Dict, List, Optional, Tuple
 
-from config import settings
+from config import get_settings
+from services.heuristics.behavioral import detect_kinematic_heuristics
+from services.heuristics.types import HeuristicContext
 from services.session_processing.data_processor import SessionPreprocessor
 from services.session_processing.models import ProcessedSession, RRWebEvent
 from services.semantic_analysis.phase2.runner import AnalysisResult, generate_final_session_analysis
@@ -37,27 +40,53 @@ async def run_semantic_pipeline(
     """
 
     # Se o processamento prévio não for injetado, executa o SessionPreprocessor
-    processed_session = processed or SessionPreprocessor.process(events, extension_metadata=extension_metadata)
+    processed_session = processed or await asyncio.to_thread(
+        SessionPreprocessor.process,
+        events,
+        extension_metadata=extension_metadata,
+    )
     log_snapshot("processed_session", processed_session)
 
+    heuristic_config = get_settings().model_dump()
+    # Sem ações do usuário não há o que os agentes interpretarem: as duas fases
+    # caem direto no caminho determinístico, sem custo nem latência de LLM.
+    use_llm = len(processed_session.raw_actions) >= heuristic_config["LLM_MIN_RAW_ACTIONS"]
+
     # Fase 1: Planejamento Estrutural. O agente recebe o contexto da extensão (se houver)
     # para melhor identificar landmarks e objetivos da página.
-    phase1_plan, phase1_trace = await run_phase1_extraction_plan(
-        processed_session, 
-        extension_metadata=extension_metadata
+    # As heurísticas cinemáticas (incl. Isolation Forest) não dependem do plano:
+    # rodam numa thread enquanto a chamada ao LLM da fase 1 está em voo.
+    kinematic_ctx = HeuristicContext(
+        actions=[],
+        kinematics=processed_session.kinematics,
+        dom_map=processed_session.dom_map,
+        page_context=None,
+        config=heuristic_config,
+    )
+    (phase1_plan, phase1_trace), kinematic_matches = await asyncio.gather(
+        run_phase1_extraction_plan(
+            processed_session,
+            extension_metadata=extension_metadata,
+            use_llm=use_llm,
+        ),
+        asyncio.to_thread(detect_kinematic_heuristics, kinematic_ctx),
     )
     log_snapshot("phase1_plan", phase1_plan)
 
     # Execução: Transforma o rastro técnico do rrweb em interações canônicas semânticas
-    execution = execute_phase1_plan(phase1_plan, processed_session)
+    # Executor e heurísticas são CPU-bound: rodam em thread para manter o loop livre.
+    execution = await asyncio.to_thread(execute_phase1_plan, phase1_plan, processed_session)
     log_snapshot("execution_phase1", execution)
 
     # Detecção de Heurísticas: Combina sinais estruturais com padrões comportamentais
-    heuristic_matches = detect_heuristics(
+    heuristic_matches = await asyncio.to_thread(
+        detect_heuristics,
         phase1_plan,
         execution.canonical_interactions,
         processed_session,
-        settings.model_dump(),
+        heuristic_config,
+        kinematic_matches=kinematic_matches,
+        kinematic_ctx=kinematic_ctx,
     )
 
     # Segmentação: Divide a sessão em episódios lógicos de interação
@@ -78,7 +107,7 @@ async def run_semantic_pipeline(
         },
         extension_metadata=extension_metadata,
     )
-    analysis = await generate_final_session_analysis(bundle)
+    analysis = await generate_final_session_analysis(bundle, use_llm=use_llm)
     bundle.pipeline_trace["final_analysis"] = analysis.pipeline_trace
 
     log_snapshot("bundle", bundle)
@@ -9,6 +9,7 @@ from __future__ import annotations
 
 import re
 from collections import defaultdict
+from operator import attrgetter
 from typing import Dict, Iterable, List, Optional
 
 from services.domain.interaction_patterns import normalize_text, page_key_from_url
@@ -20,12 +21,25 @@ from services.semantic_analysis.phase1.models import FieldGroupPlan, LabelResolu
 class _DOMIndex:
     """Índices locais para tornar a execução do plano barata e consistente."""
 
-    def __init__(self, nodes: Iterable[FlatDOMNode]):
+    def __init__(self, nodes: Iterable[FlatDOMNode], actions: Iterable[RawAction] = ()):
         self.by_id: Dict[int, FlatDOMNode] = {node.node_id: node for node in nodes}
         self.children: Dict[int, List[FlatDOMNode]] = defaultdict(list)
         for node in nodes:
             if node.parent_id is not None:
                 self.children[node.parent_id].append(node)
+        # Ações cruas agrupadas por nó alvo: cada field group consulta só os
+        # seus nós em vez de varrer o rastro inteiro.
+        self.actions_by_target: Dict[int, List[RawAction]] = defaultdict(list)
+        for action in actions:
+            if action.target_id is not None:
+                self.actions_by_target[action.target_id].append(action)
+
+    def actions_for(self, node_ids: Iterable[int]) -> List[RawAction]:
+        """Retorna as ações cujo alvo está em `node_ids`, na ordem original dos eventos."""
+
+        matched = [action for node_id in node_ids for action in self.actions_by_target.get(node_id, ())]
+        matched.sort(key=attrgetter("event_index"))
+        return matched
 
     def ancestors(self, node_id: Optional[int]) -> List[FlatDOMNode]:
         """Retorna a cadeia ancestral de um nó para resolver contexto estrutural."""
@@ -280,8 +294,8 @@ def _emit_radio_interactions(plan: FieldGroupPlan, processed: ProcessedSession,
     resolved_elements: Dict[str, ResolvedElement] = {}
     actions_by_group: Dict[str, List[RawAction]] = defaultdict(list)
 
-    for action in processed.raw_actions:
-        if action.action_type != "input" or action.target_id not in nodes_by_id:
+    for action in dom_index.actions_for(nodes_by_id):
+        if action.action_type != "input":
             continue
         node = nodes_by_id[action.target_id]
         group_key = _group_key(node, plan)
@@ -372,9 +386,7 @@ def _emit_generic_interactions(plan: FieldGroupPlan, interaction_type: str, proc
     interactions: List[CanonicalInteraction] = []
     resolved_elements: Dict[str, ResolvedElement] = {}
 
-    for action in processed.raw_actions:
-        if action.target_id not in nodes_by_id:
-            continue
+    for action in dom_index.actions_for(nodes_by_id):
         if interaction_type == "button_submit" and action.action_type != "click":
             continue
         if interaction_type in {"checkbox_selection", "dropdown_selection", "text_entry"} and action.action_type != "input":
@@ -422,7 +434,7 @@ def execute_phase1_plan(plan: Phase1ExtractionPlan, processed: ProcessedSession)
     estrutural gerado pelo rrweb.
     """
 
-    dom_index = _DOMIndex(processed.flattened_dom)
+    dom_index = _DOMIndex(processed.flattened_dom, processed.raw_actions)
     region_nodes = _find_region_nodes(dom_index, plan.regions_of_interest)
     resolved_elements: Dict[str, ResolvedElement] = {}
     canonical_interactions: List[CanonicalInteraction] = []
@@ -449,12 +461,13 @@ def execute_phase1_plan(plan: Phase1ExtractionPlan, processed: ProcessedSession)
     # não dependem de consolidação estrutural por campo.
     for action in processed.raw_actions:
         if action.action_type == "navigation":
+            page_url = action.page_url or action.details.get("href")
             canonical_interactions.append(
                 CanonicalInteraction(
                     interaction_type="navigation",
                     timestamp=action.timestamp,
-                    page_url=action.page_url or action.details.get("href"),
-                    page_key=page_key_from_url(action.page_url or action.details.get("href")),
+                    page_url=page_url,
+                    page_key=page_key_from_url(page_url),
                     value=action.details.get("href"),
                     source_event_indexes=[action.event_index],
                 )
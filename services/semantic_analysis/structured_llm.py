@@ -1,16 +1,22 @@
 """Camada compartilhada para chamadas estruturadas via OpenAI nativo.
 
-Ela cria um cliente ``AsyncOpenAI`` puro, envia ``response_format=json_schema``
-e valida a resposta com Pydantic após parsing manual do JSON.
+Ela usa um cliente ``AsyncOpenAI`` puro (reaproveitado entre chamadas), envia
+``response_format=json_schema`` e valida a resposta com Pydantic após parsing
+manual do JSON.
 """
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import logging
 import os
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Any, TypeVar
 
+import orjson
 from openai import AsyncOpenAI
 from pydantic import BaseModel, ValidationError
 
@@ -26,10 +32,74 @@ _RETRY_GUIDANCE = (
 )
 
 
+# Cache em memória das respostas já validadas, indexado pelo conteúdo exato do
+# request. Sessões reprocessadas ou duplicadas geram prompts idênticos e não
+# precisam pagar outra inferência. AI_LLM_CACHE_SIZE=0 desliga o cache.
+_RESPONSE_CACHE: "OrderedDict[str, BaseModel]" = OrderedDict()
+
+# Chamadas determinísticas idênticas em voo ao mesmo tempo (ex.: reprocessamento
+# em lote da mesma sessão) compartilham uma única inferência: a primeira executa
+# e as demais aguardam o mesmo future.
+_IN_FLIGHT: "dict[str, asyncio.Future[BaseModel]]" = {}
+
+
 class StructuredLLMError(RuntimeError):
     """Erro explícito para falhas na infraestrutura estruturada de LLM."""
 
 
+def _cache_capacity() -> int:
+    try:
+        return max(0, int(os.getenv("AI_LLM_CACHE_SIZE", "128")))
+    except ValueError:
+        return 128
+
+
+def _cache_key(
+    llm_model: str,
+    schema_name: str,
+    messages: list[dict[str, str]],
+    temperature: float,
+    max_tokens: int | None,
+    seed: int | None,
+) -> str:
+    """Gera uma chave estável a partir de tudo que influencia a resposta."""
+
+    # orjson devolve bytes UTF-8 direto: sem a string intermediária do tamanho do prompt.
+    raw = orjson.dumps(
+        [llm_model, schema_name, messages, temperature, max_tokens, seed],
+        option=orjson.OPT_SORT_KEYS,
+    )
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _cache_get(key: str, model_class: type[TModel]) -> TModel | None:
+    cached = _RESPONSE_CACHE.get(key)
+    if cached is None or not isinstance(cached, model_class):
+        return None
+    _RESPONSE_CACHE.move_to_end(key)
+    # Cópia profunda: os chamadores reparam/mutam a análise depois da chamada.
+    return cached.model_copy(deep=True)
+
+
+def _cache_put(key: str, value: BaseModel, capacity: int) -> None:
+    _RESPONSE_CACHE[key] = value.model_copy(deep=True)
+    _RESPONSE_CACHE.move_to_end(key)
+    while len(_RESPONSE_CACHE) > capacity:
+        _RESPONSE_CACHE.popitem(last=False)
+
+
+def _prompt_cache_key(schema_name: str) -> str | None:
+    """Chave de roteamento do cache de prompt do provedor, se configurada.
+
+    Chamadas do mesmo schema compartilham system/developer prompts idênticos;
+    com a chave, o provedor as encaminha para o mesmo cache de prefixo.
+    Fica desligada por padrão porque nem todo backend compatível aceita o campo.
+    """
+
+    prefix = (os.getenv("AI_PROMPT_CACHE_KEY") or "").strip()
+    return f"{prefix}:{schema_name}" if prefix else None
+
+
 def _load_llm_env() -> tuple[str, str, str | None]:
     """Lê o contrato de ambiente usado pelas fases semântico-estruturais."""
 
@@ -45,19 +115,37 @@ def _load_llm_env() -> tuple[str, str, str | None]:
     return api_token, llm_model, llm_url
 
 
-def _build_client() -> tuple[AsyncOpenAI, str]:
-    """Cria um cliente OpenAI compatível com provedores nativos JSON schema."""
+@lru_cache(maxsize=4)
+def _get_client(api_token: str, llm_url: str | None) -> AsyncOpenAI:
+    """Cliente compartilhado por credencial/endpoint.
+
+    O ``AsyncOpenAI`` mantém um pool HTTP keep-alive: reaproveitá-lo evita um
+    handshake TCP/TLS por chamada (cada sessão faz várias). Trocar o token ou a
+    URL no ambiente gera um cliente novo.
+    """
 
-    api_token, llm_model, llm_url = _load_llm_env()
     client_kwargs: dict[str, Any] = {"api_key": api_token}
     if llm_url:
         client_kwargs["base_url"] = llm_url
-    return AsyncOpenAI(**client_kwargs), llm_model
+    return AsyncOpenAI(**client_kwargs)
+
+
+def _build_client() -> tuple[AsyncOpenAI, str]:
+    """Obtém o cliente OpenAI compatível com provedores nativos JSON schema."""
+
+    api_token, llm_model, llm_url = _load_llm_env()
+    return _get_client(api_token, llm_url), llm_model
 
 
-def _build_response_format(schema_name: str, schema: dict[str, Any]) -> dict[str, Any]:
-    """Monta o payload de structured output esperado pelo backend."""
+@lru_cache(maxsize=32)
+def _build_response_format(schema_name: str, model_class: type[BaseModel]) -> dict[str, Any]:
+    """Monta o payload de structured output esperado pelo backend.
 
+    Gerar o JSON Schema percorre o modelo inteiro (alguns ms para os contratos
+    das fases); o resultado é fixo por modelo, então fica montado uma vez só.
+    """
+
+    schema = model_class.model_json_schema()
     return {
         "type": "json_schema",
         "json_schema": {
@@ -88,6 +176,23 @@ def _extract_content(response: Any) -> str:
     return str(content)
 
 
+def _log_prompt_cache_usage(response: Any, schema_name: str) -> None:
+    """Registra quantos tokens de entrada vieram do cache de prompt do provedor."""
+
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None) if details is not None else None
+    logger.info(
+        "Structured LLM usage schema=%s prompt_tokens=%s cached_tokens=%s completion_tokens=%s",
+        schema_name,
+        getattr(usage, "prompt_tokens", None),
+        cached_tokens or 0,
+        getattr(usage, "completion_tokens", None),
+    )
+
+
 def _format_validation_error(exc: ValidationError) -> str:
     """Compacta o erro de validação para orientar a correção no retry."""
 
@@ -109,14 +214,93 @@ async def structured_llm_call(
     O fluxo é:
     1. gerar JSON Schema do modelo Pydantic;
     2. chamar o backend com ``response_format=json_schema``;
-    3. fazer ``json.loads`` manual;
+    3. fazer o parse manual do JSON (orjson);
     4. validar com ``model_validate``;
     5. tentar correção caso a resposta venha vazia, inválida ou fora do schema.
+
+    Chamadas determinísticas (``temperature == 0``) com exatamente as mesmas
+    mensagens reaproveitam a última resposta validada sem nova inferência, e
+    chamadas idênticas simultâneas compartilham uma única requisição.
     """
 
     client, llm_model = _build_client()
-    schema = model_class.model_json_schema()
-    response_format = _build_response_format(schema_name, schema)
+
+    if temperature != 0:
+        return await _run_structured_call(
+            client,
+            llm_model,
+            model_class=model_class,
+            schema_name=schema_name,
+            messages=messages,
+            temperature=temperature,
+            max_retries=max_retries,
+            max_tokens=max_tokens,
+            seed=seed,
+        )
+
+    capacity = _cache_capacity()
+    cache_key = _cache_key(llm_model, schema_name, messages, temperature, max_tokens, seed)
+    if capacity:
+        cached = _cache_get(cache_key, model_class)
+        if cached is not None:
+            logger.info("Structured LLM cache hit schema=%s model=%s", schema_name, llm_model)
+            return cached
+
+    pending = _IN_FLIGHT.get(cache_key)
+    if pending is not None:
+        logger.info("Structured LLM call coalesced schema=%s model=%s", schema_name, llm_model)
+        shared = await asyncio.shield(pending)
+        return shared.model_copy(deep=True)
+
+    future: "asyncio.Future[BaseModel]" = asyncio.get_running_loop().create_future()
+    _IN_FLIGHT[cache_key] = future
+    try:
+        result = await _run_structured_call(
+            client,
+            llm_model,
+            model_class=model_class,
+            schema_name=schema_name,
+            messages=messages,
+            temperature=temperature,
+            max_retries=max_retries,
+            max_tokens=max_tokens,
+            seed=seed,
+        )
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as exc:
+        future.set_exception(exc)
+        # Marca a exceção como consumida quando ninguém mais aguardava o future.
+        future.exception()
+        raise
+    else:
+        # Os aguardantes recebem uma cópia própria: o chamador original pode
+        # mutar ``result`` antes de eles acordarem.
+        future.set_result(result.model_copy(deep=True))
+        if capacity:
+            _cache_put(cache_key, result, capacity)
+        return result
+    finally:
+        _IN_FLIGHT.pop(cache_key, None)
+
+
+async def _run_structured_call(
+    client: AsyncOpenAI,
+    llm_model: str,
+    *,
+    model_class: type[TModel],
+    schema_name: str,
+    messages: list[dict[str, str]],
+    temperature: float,
+    max_retries: int,
+    max_tokens: int | None,
+    seed: int | None,
+) -> TModel:
+    """Laço de chamada + validação + retries de correção, sem cache."""
+
+    response_format = _build_response_format(schema_name, model_class)
+    prompt_cache_key = _prompt_cache_key(schema_name)
 
     last_error: str = ""
     last_content: str = ""
@@ -155,14 +339,18 @@ async def structured_llm_call(
             request_kwargs["max_completion_tokens"] = max_tokens
         if seed is not None:
             request_kwargs["seed"] = seed
+        if prompt_cache_key:
+            request_kwargs["prompt_cache_key"] = prompt_cache_key
 
         response = await client.chat.completions.create(**request_kwargs)
+        _log_prompt_cache_usage(response, schema_name)
 
         try:
             last_content = _extract_content(response)
-            data = json.loads(last_content)
+            # orjson aceita a str direto, sem reencode.
+            data = orjson.loads(last_content)
             return model_class.model_validate(data)
-        except json.JSONDecodeError as exc:
+        except orjson.JSONDecodeError as exc:
             last_error = f"JSONDecodeError: {exc}"
         except ValidationError as exc:
             last_error = f"ValidationError:\n{_format_validation_error(exc)}"
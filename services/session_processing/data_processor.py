@@ -1,8 +1,9 @@
 import logging
 from collections import defaultdict
-from typing import Any, Dict, List, Optional, Set
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
 
-from services.session_processing.models import FlatDOMNode, KinematicVector, PageMetadata, ProcessedSession, RRWebEvent, RawAction, UserAction
+from services.session_processing.models import FlatDOMNode, KinematicVector, PageMetadata, ProcessedSession, RRWebEvent, RRWebEventRecord, RawAction, UserAction
 from services.domain.interaction_patterns import normalize_text
 
 # Configuração de Logs para monitoramento do processamento de traços de eventos
@@ -28,7 +29,7 @@ class SessionPreprocessor:
     RELEVANT_ATTRS: Set[str] = {'id', 'class', 'name', 'type', 'aria-label', 'placeholder', 'value', 'href', 'role'}
 
     @staticmethod
-    def process(events: List[RRWebEvent], extension_metadata: Optional[Dict[str, Any]] = None) -> ProcessedSession:
+    def process(events: Iterable[Union[RRWebEvent, RRWebEventRecord]], extension_metadata: Optional[Dict[str, Any]] = None) -> ProcessedSession:
         """
         Processa uma lista de eventos brutos do rrweb em artefatos neutros.
         
@@ -36,17 +37,21 @@ class SessionPreprocessor:
         para acelerar a reconstrução e fornecer contexto semântico imediato à fase 1.
         
         Args:
-            events: Lista de eventos técnicos do rrweb.
+            events: Eventos técnicos do rrweb (lista ou gerador; percorridos uma única vez).
             extension_metadata: Dicionário opcional contendo o payload consolidado da extensão.
             
         Returns:
             ProcessedSession: Estrutura processada para análise semântica.
         """
-        if not events:
+        # Aceita qualquer iterável: o chamador pode normalizar os eventos sob
+        # demanda sem materializar uma segunda lista do tamanho da sessão.
+        event_iter = iter(events)
+        first_event = next(event_iter, None)
+        if first_event is None:
             return ProcessedSession(initial_timestamp=0, total_duration=0)
 
         # 1. Setup Temporal: O primeiro evento marca o início (T0) da sessão
-        start_time = events[0].timestamp
+        start_time = first_event.timestamp
         last_timestamp = start_time
         
         # Estruturas para acumular os dados durante o loop único (O(N))
@@ -89,9 +94,15 @@ class SessionPreprocessor:
         # Tipos específicos de interação de mouse dentro do rrweb
         INTERACTION_CLICK = 2
 
+        # O movimento do cursor gera uma amostra por posição e domina o laço:
+        # construtor e append ficam em variáveis locais.
+        new_kinematic = KinematicVector
+        append_kinematic = kinematics.append
+
         # --- LOOP ÚNICO (O(N)) ---
         # Garantimos eficiência máxima percorrendo a lista de eventos apenas uma vez
-        for idx, event in enumerate(events):
+        idx = 0
+        for idx, event in enumerate(chain((first_event,), event_iter)):
             try:
                 current_raw_ts = event.timestamp
                 # Normaliza o tempo para ms relativos ao início para facilitar cálculos posteriores
@@ -123,6 +134,7 @@ class SessionPreprocessor:
                 elif evt_type == TYPE_META:
                     href = data.get('href')
                     width = data.get('width')
+                    height = data.get('height')
 
                     if href:
                         current_page_url = href
@@ -150,12 +162,12 @@ class SessionPreprocessor:
                         event_index["navigation"].append(idx)
                     elif width:
                         page_metadata.viewport_width = width
-                        page_metadata.viewport_height = data.get("height")
+                        page_metadata.viewport_height = height
                         # Registra mudanças na viewport do usuário
                         actions.append(UserAction(
                             timestamp=delta_ts,
                             action_type='resize',
-                            details=f"Viewport: {width}x{data.get('height')}"
+                            details=f"Viewport: {width}x{height}"
                         ))
                         raw_actions.append(
                             RawAction(
@@ -164,7 +176,7 @@ class SessionPreprocessor:
                                 event_type=evt_type,
                                 event_index=idx,
                                 page_url=current_page_url,
-                                details={"width": width, "height": data.get("height")},
+                                details={"width": width, "height": height},
                             )
                         )
                         event_index["resize"].append(idx)
@@ -210,7 +222,7 @@ class SessionPreprocessor:
                             # Filtra coordenadas negativas ou inválidas
                             if isinstance(x, (int, float)) and isinstance(y, (int, float)):
                                 if x >= 0 and y >= 0:
-                                    kinematics.append(KinematicVector(
+                                    append_kinematic(new_kinematic(
                                         timestamp=delta_ts + int(p_offset or 0),
                                         x=int(x),
                                         y=int(y)
@@ -224,12 +236,14 @@ class SessionPreprocessor:
                             target_id = data.get('id')
                             # Busca no mapa DOM o que é esse ID em termos de HTML simplificado
                             node_html = dom_map.get(target_id, "unknown_element")
+                            click_x = data.get('x')
+                            click_y = data.get('y')
 
                             actions.append(UserAction(
                                 timestamp=delta_ts,
                                 action_type='click',
                                 target_id=target_id,
-                                details=f"Element: {node_html} | Coords: ({data.get('x')}, {data.get('y')})"
+                                details=f"Element: {node_html} | Coords: ({click_x}, {click_y})"
                             ))
                             raw_actions.append(
                                 RawAction(
@@ -240,8 +254,8 @@ class SessionPreprocessor:
                                     event_index=idx,
                                     target_id=target_id,
                                     page_url=current_page_url,
-                                    x=data.get("x"),
-                                    y=data.get("y"),
+                                    x=click_x,
+                                    y=click_y,
                                     details={"html": node_html},
                                 )
                             )
@@ -255,7 +269,8 @@ class SessionPreprocessor:
                         scroll_y = data.get('scrollY')
                         if delta_y is not None or scroll_y is not None:
                             # Inferência de direção para facilitar a narrativa do LLM no prompt
-                            direction = "down" if (delta_y or scroll_y or 0) > 0 else "up" if (delta_y or scroll_y or 0) < 0 else "neutral"
+                            scroll_value = delta_y or scroll_y or 0
+                            direction = "down" if scroll_value > 0 else "up" if scroll_value < 0 else "neutral"
                             actions.append(UserAction(
                                 timestamp=delta_ts,
                                 action_type='scroll',
@@ -282,10 +297,11 @@ class SessionPreprocessor:
                     elif source == SOURCE_RESIZE:
                         width = data.get('width')
                         if width:
+                            height = data.get('height')
                             actions.append(UserAction(
                                 timestamp=delta_ts,
                                 action_type='resize',
-                                details=f"Viewport: {width}x{data.get('height')}"
+                                details=f"Viewport: {width}x{height}"
                             ))
                             raw_actions.append(
                                 RawAction(
@@ -295,7 +311,7 @@ class SessionPreprocessor:
                                     source=source,
                                     event_index=idx,
                                     page_url=current_page_url,
-                                    details={"width": width, "height": data.get("height")},
+                                    details={"width": width, "height": height},
                                 )
                             )
                             event_index["resize"].append(idx)
@@ -357,7 +373,12 @@ class SessionPreprocessor:
         # 3. Consolidação Final: Cálculo da duração total e retorno do container agnóstico
         total_duration = last_timestamp - start_time
         
-        logger.info(f"Processed session: {len(events)} raw events -> {len(kinematics)} vectors, {len(actions)} actions.")
+        logger.debug(
+            "Processed session: %s raw events -> %s vectors, %s actions.",
+            idx + 1,
+            len(kinematics),
+            len(actions),
+        )
         
         return ProcessedSession(
             initial_timestamp=start_time,
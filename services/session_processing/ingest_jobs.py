@@ -0,0 +1,95 @@
+"""
+Contrato dos jobs de ingestão trocados entre o /ingest e o worker.
+
+A API valida o payload da extensão e monta o corpo da mensagem; o worker lê a
+mensagem de volta e separa eventos rrweb e metadados. Manter os dois lados no
+mesmo módulo evita que o formato do job derive entre produtor e consumidor.
+"""
+
+from __future__ import annotations
+
+import base64
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from pydantic import ValidationError
+
+from services.session_processing.models import ExtensionSessionPayload
+
+
+def new_session_uuid() -> str:
+    """Gera um identificador de sessão de 128 bits em base64 url-safe (22 caracteres)."""
+    return base64.urlsafe_b64encode(os.urandom(16)).rstrip(b"=").decode("ascii")
+
+
+def validate_ingest_payload(data: Any) -> Tuple[ExtensionSessionPayload, bool]:
+    """
+    Valida o corpo decodificado do /ingest.
+
+    Tenta primeiro o modo estrito: se passar, nenhum valor precisou de coerção
+    (``"type": "4"``, ``"timestamp": 2000.0``...) e os bytes originais podem ir
+    para a fila como estão. Caso contrário valida em modo lax, como antes, e o
+    segundo item do retorno indica que o job deve levar o payload normalizado.
+    Levanta ``ValidationError`` se o corpo for inválido.
+    """
+    try:
+        return ExtensionSessionPayload.model_validate(data, strict=True), True
+    except ValidationError:
+        return ExtensionSessionPayload.model_validate(data), False
+
+
+def build_ingest_job_body(
+    payload: ExtensionSessionPayload,
+    user_id: str,
+    raw_body: Optional[bytes] = None,
+) -> Tuple[str, bytes]:
+    """
+    Monta o corpo JSON do job de ingestão e gera o session_uuid da sessão.
+
+    Com ``raw_body`` (corpo que passou na validação estrita), os bytes originais
+    são anexados sem re-serializar em ``payload``; sessões rrweb chegam a vários
+    MB e isso evita uma cópia completa e a serialização de volta. Os metadados,
+    pequenos, seguem sempre normalizados pelo modelo em ``metadata``: chaves
+    desconhecidas ficam de fora e opcionais ausentes viram ``None``.
+    """
+    session_uuid = new_session_uuid()
+    metadata = payload.model_dump(mode="json", exclude={"rrweb"})
+    envelope: Dict[str, Any] = {
+        "job_type": "ingest",
+        "user_id": user_id,
+        "session_uuid": session_uuid,
+        "metadata": metadata,  # Contém axe, semantics, interaction_summary, etc.
+        "timestamp_ns": time.time_ns(),  # epoch em nanossegundos (UTC)
+    }
+
+    if raw_body is None:
+        envelope["events"] = payload.rrweb.model_dump(mode="json")["events"]
+        return session_uuid, orjson.dumps(envelope)
+
+    # Anexa o corpo original como último campo do objeto JSON
+    encoded = orjson.dumps(envelope)
+    return session_uuid, b"".join((encoded[:-1], b',"payload":', raw_body, b"}"))
+
+
+def read_ingest_job(message_data: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Extrai ``(eventos rrweb, metadados)`` de uma mensagem de ingestão.
+
+    Jobs com ``payload`` trazem o corpo original da extensão, de onde saem só os
+    eventos; os metadados vêm do campo ``metadata`` já normalizado. Mensagens
+    publicadas antes desse campo existir usam o restante do corpo original.
+    """
+    if "payload" not in message_data:
+        return message_data.get("events", []), message_data.get("metadata") or {}
+
+    body = message_data.get("payload") or {}
+    rrweb = body.get("rrweb") if isinstance(body, dict) else None
+    raw_events: List[Any] = rrweb.get("events", []) if isinstance(rrweb, dict) else []
+
+    metadata = message_data.get("metadata")
+    if metadata is None and isinstance(body, dict):
+        body.pop("rrweb", None)
+        metadata = body
+    return raw_events, metadata or {}
@@ -12,10 +12,11 @@ posteriores, que era exatamente uma das fontes de acoplamento do fluxo antigo.
 
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 
 class KinematicVector(BaseModel):
@@ -106,6 +107,41 @@ class RRWebEvent(BaseModel):
     timestamp: int
 
 
+# Mesma coerção (modo lax) que o ``RRWebEvent`` aplica no /ingest.
+_INT_ADAPTER = TypeAdapter(int)
+
+
+def _coerce_int(value: Any) -> int:
+    return value if type(value) is int else _INT_ADAPTER.validate_python(value)
+
+
+@dataclass(slots=True)
+class RRWebEventRecord:
+    """Evento rrweb usado no caminho interno do worker.
+
+    Tem os mesmos campos do ``RRWebEvent``, mas sem o custo de validação e de
+    instância de um ``BaseModel`` por evento em sessões com milhões de eventos.
+    """
+    type: int
+    data: Dict[str, Any]
+    timestamp: int
+
+    @classmethod
+    def from_raw(cls, event: Dict[str, Any]) -> "RRWebEventRecord":
+        """Monta o registro a partir do dicionário bruto do payload.
+
+        O worker recebe os bytes originais do cliente, não os valores coercidos
+        pelo /ingest: ``"type": "4"`` ou ``"timestamp": 2000.0`` passam na
+        validação e precisam virar ``int`` aqui. Valores que o /ingest também
+        recusaria levantam ``ValidationError``.
+        """
+        return cls(
+            _coerce_int(event.get("type")),
+            event.get("data", {}),
+            _coerce_int(event.get("timestamp", 0)),
+        )
+
+
 class SessionMeta(BaseModel):
     """Metadados macro da sessão coletados no navegador."""
     session_id: str
@@ -7,21 +7,29 @@ heurísticas e LLM fora da request HTTP.
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-from sqlalchemy.exc import IntegrityError
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import orjson
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlmodel import Session as DBSession, select
 
-from services.core.models import SessionAnalysis, User
+from services.core.models import SessionAnalysis, User, new_uuid7
 from services.domain.models import BoundingBox, InsightEvent
 from services.session_processing.data_processor import SessionPreprocessor
-from services.session_processing.models import RRWebEvent, SessionProcessResponse, SessionProcessStats
+from services.session_processing.models import RRWebEventRecord, SessionProcessResponse, SessionProcessStats
 from services.semantic_analysis.pipeline import run_semantic_pipeline
 from services.core.storage import storage_service
 
 logger = logging.getLogger(__name__)
 
+_INSIGHT_LIST_ADAPTER = TypeAdapter(List[InsightEvent])
+
 
 def unpack_semantic_llm_output(llm_output: Dict[str, Any]) -> Dict[str, Any]:
     """Normaliza a saída da camada LLM para os contratos antigo e novo."""
@@ -56,35 +64,99 @@ def unpack_semantic_llm_output(llm_output: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _normalize_rrweb_events(raw_events: List[Dict[str, Any]]) -> List[RRWebEvent]:
-    return [
-        RRWebEvent(
-            type=event.get("type"),
-            data=event.get("data", {}),
-            timestamp=event.get("timestamp", 0),
-        )
-        for event in raw_events
-    ]
+def _iter_rrweb_events(raw_events: List[Dict[str, Any]]) -> Iterator[RRWebEventRecord]:
+    """Normaliza os eventos brutos sob demanda, um por vez, para o pré-processador.
+
+    O /ingest valida o payload, mas encaminha os bytes originais: ``type`` e
+    ``timestamp`` ainda podem chegar como str/float e são coercidos aqui, do
+    mesmo jeito que o Pydantic faria. Um evento que nem isso aceita é ignorado.
+    """
+    for index, event in enumerate(raw_events):
+        try:
+            record = RRWebEventRecord.from_raw(event)
+        except (ValidationError, AttributeError) as exc:
+            logger.warning("Ignorando evento rrweb inválido | index=%s | erro=%s", index, exc)
+            continue
+        yield record
+
+
+def compute_session_content_hash(
+    raw_events: List[Dict[str, Any]],
+    extension_metadata: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Hash estável da entrada do pipeline (eventos + metadados da extensão).
+
+    O storage preserva a ordem das chaves do payload original, então a mesma
+    sessão gera os mesmos bytes tanto no /ingest quanto no reprocessamento.
+    """
+    return hashlib.sha256(orjson.dumps([raw_events, extension_metadata or {}])).hexdigest()
+
+
+def _response_from_stored(analysis: SessionAnalysis) -> SessionProcessResponse:
+    """Reconstrói a resposta do pipeline a partir de uma análise já persistida."""
+    narrative = analysis.narrative or {}
+    intent = analysis.intent_analysis or {}
+    # Dados gravados por este mesmo módulo: sem revalidar bundle e insights.
+    return SessionProcessResponse.model_construct(
+        session_uuid=analysis.session_uuid,
+        user_id=analysis.user_id,
+        narrative=narrative.get("text", ""),
+        psychometrics=analysis.psychometrics or {},
+        intent_analysis=intent.get("intent_analysis", {}),
+        insights=analysis.insights or [],
+        stats=SessionProcessStats(**(analysis.process_stats or {})),
+        semantic_bundle=narrative.get("semantic_bundle", {}),
+        llm_output=intent.get("llm_output", {}),
+        structured_analysis=narrative.get("structured_analysis", {}),
+    )
 
 
 def _ensure_user(session: DBSession, user_id: str) -> None:
-    existing_user = session.get(User, user_id)
-    if existing_user:
-        return
+    """Garante o usuário na transação corrente, sem commit próprio.
 
-    new_user = User(
-        id=user_id,
-        email=f"{user_id}@janus-idp.local",
+    ``ON CONFLICT DO NOTHING`` resolve em um único round-trip a corrida entre
+    workers que antes exigia get() + commit() + retry em IntegrityError.
+    """
+    statement = (
+        pg_insert(User)
+        .values(id=user_id, email=f"{user_id}@janus-idp.local")
+        .on_conflict_do_nothing(index_elements=[User.id])
     )
-    session.add(new_user)
+    session.exec(statement)
 
-    try:
-        session.commit()
-    except IntegrityError:
-        session.rollback()
-        # Outro worker pode ter criado o usuário entre o get() e o commit().
-        if session.get(User, user_id) is None:
-            raise
+
+def _upsert_analysis(
+    session: DBSession,
+    *,
+    user_id: str,
+    session_uuid: str,
+    values: Dict[str, Any],
+) -> SessionAnalysis:
+    """Insere ou atualiza a análise da sessão com um único ``INSERT ... ON CONFLICT``.
+
+    Só as colunas em ``values`` são sobrescritas numa análise existente; o
+    usuário é garantido na mesma transação.
+    """
+    _ensure_user(session, user_id)
+
+    row = {"user_id": user_id, **values}
+    insert_statement = pg_insert(SessionAnalysis).values(id=new_uuid7(), session_uuid=session_uuid, **row)
+    # O UPDATE reaproveita a linha proposta (EXCLUDED) em vez de reenviar os
+    # parâmetros: o bundle semântico trafega uma vez só por escrita.
+    update_columns = {key: insert_statement.excluded[key] for key in row}
+    statement = (
+        insert_statement
+        .on_conflict_do_update(
+            index_elements=[SessionAnalysis.session_uuid],
+            # ON CONFLICT não dispara o onupdate da coluna: atualiza explicitamente.
+            set_={**update_columns, "updated_at": func.now()},
+        )
+        .returning(SessionAnalysis)
+        .execution_options(populate_existing=True)
+    )
+    analysis = session.exec(statement).scalar_one()
+    session.commit()
+    return analysis
 
 
 def _persist_analysis(
@@ -98,17 +170,13 @@ def _persist_analysis(
     structured_analysis: Dict[str, Any],
     semantic_bundle: Dict[str, Any],
     llm_output: Dict[str, Any],
-    insights: List[InsightEvent],
+    insights: List[Dict[str, Any]],
     process_stats: Dict[str, Any],
     processing_status: str,
     processing_error: Optional[str] = None,
+    content_hash: Optional[str] = None,
 ) -> SessionAnalysis:
-    statement = select(SessionAnalysis).where(SessionAnalysis.session_uuid == session_uuid)
-    existing_analysis = session.exec(statement).first()
-
     payload = {
-        "session_uuid": session_uuid,
-        "user_id": user_id,
         "narrative": {
             "text": narrative,
             "structured_analysis": structured_analysis,
@@ -120,26 +188,14 @@ def _persist_analysis(
             "structured_analysis": structured_analysis,
             "llm_output": llm_output,
         },
-        "insights": [insight.model_dump(mode="json") for insight in insights],
+        "insights": insights,
         "process_stats": process_stats,
         "processing_status": processing_status,
         "processing_error": processing_error,
         "processed_at": datetime.utcnow() if processing_status == "completed" else None,
+        "content_hash": content_hash,
     }
-
-    if existing_analysis:
-        for key, value in payload.items():
-            setattr(existing_analysis, key, value)
-        session.add(existing_analysis)
-        session.commit()
-        session.refresh(existing_analysis)
-        return existing_analysis
-
-    new_analysis = SessionAnalysis(**payload)
-    session.add(new_analysis)
-    session.commit()
-    session.refresh(new_analysis)
-    return new_analysis
+    return _upsert_analysis(session, user_id=user_id, session_uuid=session_uuid, values=payload)
 
 
 def _match_to_insight_event(match: Any) -> InsightEvent:
@@ -189,32 +245,30 @@ def mark_analysis_status(
     status: str,
     processing_error: Optional[str] = None,
 ) -> SessionAnalysis:
-    _ensure_user(session, user_id)
+    return _upsert_analysis(
+        session,
+        user_id=user_id,
+        session_uuid=session_uuid,
+        values={
+            "processing_status": status,
+            "processing_error": processing_error,
+            "processed_at": datetime.utcnow() if status == "completed" else None,
+        },
+    )
+
 
+def _find_unchanged_analysis(
+    session: DBSession,
+    *,
+    session_uuid: str,
+    content_hash: str,
+) -> Optional[SessionAnalysis]:
+    """Devolve a análise existente se ela foi gerada a partir da mesma entrada."""
     statement = select(SessionAnalysis).where(SessionAnalysis.session_uuid == session_uuid)
     existing_analysis = session.exec(statement).first()
-
-    if existing_analysis:
-        existing_analysis.user_id = user_id
-        existing_analysis.processing_status = status
-        existing_analysis.processing_error = processing_error
-        existing_analysis.processed_at = datetime.utcnow() if status == "completed" else None
-        session.add(existing_analysis)
-        session.commit()
-        session.refresh(existing_analysis)
-        return existing_analysis
-
-    analysis = SessionAnalysis(
-        session_uuid=session_uuid,
-        user_id=user_id,
-        processing_status=status,
-        processing_error=processing_error,
-        processed_at=datetime.utcnow() if status == "completed" else None,
-    )
-    session.add(analysis)
-    session.commit()
-    session.refresh(analysis)
-    return analysis
+    if existing_analysis is None or existing_analysis.content_hash != content_hash:
+        return None
+    return existing_analysis
 
 
 async def process_session_events(
@@ -224,6 +278,8 @@ async def process_session_events(
     session_uuid: str,
     raw_events: List[Dict[str, Any]],
     extension_metadata: Optional[Dict[str, Any]] = None,
+    force: bool = False,
+    before_completed: Optional[Callable[[], Awaitable[None]]] = None,
 ) -> SessionProcessResponse:
     """
     Executa o pipeline pesado de análise (Fase 1, Heurísticas, Fase 2).
@@ -232,21 +288,60 @@ async def process_session_events(
     os eventos brutos do rrweb para reconstrução e os metadados da extensão
     para enriquecer o contexto enviado aos agentes de IA e aos motores de 
     heurísticas estruturais.
-    """
-    _ensure_user(session, user_id)
 
-    # Normaliza eventos brutos (dicionários) para instâncias do modelo RRWebEvent
-    rrweb_events = _normalize_rrweb_events(raw_events)
+    Se a última análise concluída foi gerada a partir exatamente da mesma
+    entrada (mesmo ``content_hash``), o pipeline não é reexecutado e o
+    resultado persistido é devolvido, a menos que ``force`` seja verdadeiro.
+
+    ``before_completed`` é aguardado antes de a análise ser marcada como
+    concluída; se levantar, nada é gravado como "completed". O worker usa isso
+    para que o upload do payload bruto, que roda em paralelo ao pipeline,
+    termine com sucesso antes.
+    """
+    content_hash = await asyncio.to_thread(compute_session_content_hash, raw_events, extension_metadata)
+    if not force:
+        # A sessão SQLModel é síncrona: o acesso ao banco roda em thread.
+        existing_analysis = await asyncio.to_thread(
+            _find_unchanged_analysis,
+            session,
+            session_uuid=session_uuid,
+            content_hash=content_hash,
+        )
+        if existing_analysis is not None:
+            logger.info(
+                "Entrada inalterada desde a última análise; pipeline ignorado | session_uuid=%s",
+                session_uuid,
+            )
+            if before_completed is not None:
+                await before_completed()
+            analysis = await asyncio.to_thread(
+                mark_analysis_status,
+                session,
+                user_id=user_id,
+                session_uuid=session_uuid,
+                status="completed",
+            )
+            return _response_from_stored(analysis)
 
     # Fase A: Pré-processamento neutro para extração de cinemática e DOM simplificado.
+    # Os eventos brutos (dicionários) são normalizados para RRWebEventRecord sob demanda,
+    # dentro do próprio loop do pré-processador: nenhuma lista paralela de modelos
+    # do tamanho da sessão fica em memória. O pré-processamento é
+    # CPU-bound e roda em thread para não travar o event loop do worker
+    # (heartbeats do RabbitMQ incluídos).
     # Passamos os metadados da extensão para otimizar o contexto inicial.
-    processed = SessionPreprocessor.process(rrweb_events, extension_metadata=extension_metadata)
+    processed = await asyncio.to_thread(
+        SessionPreprocessor.process,
+        _iter_rrweb_events(raw_events),
+        extension_metadata=extension_metadata,
+    )
     
     # Fase B: Pipeline Semântico (Orquestração de Fase 1 e Fase 2).
     # O bundle semântico gerado conterá as evidências de Axe e Heurísticas de cliente.
+    # Com o pré-processamento injetado, o pipeline não relê os eventos.
     semantic_bundle, analysis_result = await run_semantic_pipeline(
-        rrweb_events, 
-        processed, 
+        [],
+        processed,
         extension_metadata=extension_metadata
     )
     llm_output = analysis_result.model_dump(mode="json")
@@ -268,17 +363,27 @@ async def process_session_events(
         "task_progression",
         "region_alternation",
     }]
-    all_insights = [_match_to_insight_event(item) for item in surfaced_matches]
+    # Serializados uma única vez (lista inteira no pydantic-core): o mesmo JSON vai
+    # para o banco e para a resposta.
+    insights_json = _INSIGHT_LIST_ADAPTER.dump_python(
+        [_match_to_insight_event(item) for item in surfaced_matches],
+        mode="json",
+    )
+    semantic_bundle_json = semantic_bundle.model_dump(mode="json")
 
     stats = SessionProcessStats(
-        total_events=len(rrweb_events),
+        total_events=len(raw_events),
         kinematic_vectors=len(processed.kinematics),
         user_actions=len(processed.actions),
         ml_insights=len(erratic_matches),
         rage_clicks=insights_rage,
     )
 
-    _persist_analysis(
+    if before_completed is not None:
+        await before_completed()
+
+    await asyncio.to_thread(
+        _persist_analysis,
         session,
         user_id=user_id,
         session_uuid=session_uuid,
@@ -286,23 +391,25 @@ async def process_session_events(
         psychometrics=psychometrics,
         intent_analysis=intent_analysis,
         structured_analysis=structured_analysis,
-        semantic_bundle=semantic_bundle.model_dump(mode="json"),
+        semantic_bundle=semantic_bundle_json,
         llm_output=llm_output,
-        insights=all_insights,
+        insights=insights_json,
         process_stats=stats.model_dump(mode="json"),
         processing_status="completed",
         processing_error=None,
+        content_hash=content_hash,
     )
 
-    return SessionProcessResponse(
+    # Todos os blocos saíram de modelos validados (dumps acima): montagem sem revalidação.
+    return SessionProcessResponse.model_construct(
         session_uuid=session_uuid,
         user_id=user_id,
         narrative=narrative,
         psychometrics=psychometrics,
         intent_analysis=intent_analysis,
-        insights=[insight.model_dump(mode="json") for insight in all_insights],
+        insights=insights_json,
         stats=stats,
-        semantic_bundle=semantic_bundle.model_dump(mode="json"),
+        semantic_bundle=semantic_bundle_json,
         llm_output=llm_output,
         structured_analysis=structured_analysis,
     )
@@ -0,0 +1,77 @@
+import orjson
+
+from services.session_processing.ingest_jobs import (
+    build_ingest_job_body,
+    read_ingest_job,
+    validate_ingest_payload,
+)
+
+
+def _session_body(events):
+    return orjson.dumps(
+        {
+            "session_meta": {
+                "session_id": "s-1",
+                "started_at": 1000,
+                "ended_at": 2000,
+                "page_url": "https://example.com/form",
+                "page_title": "Formulário",
+                "user_agent": "pytest",
+            },
+            "rrweb": {"events": events},
+            "page_semantics": {"landmarks": []},
+            "unknown_extension_field": {"debug": True},
+        }
+    )
+
+
+def _job_from_body(raw_body):
+    payload, raw_is_normalized = validate_ingest_payload(orjson.loads(raw_body))
+    _, message_body = build_ingest_job_body(
+        payload,
+        "user-1",
+        raw_body=raw_body if raw_is_normalized else None,
+    )
+    return raw_is_normalized, orjson.loads(message_body)
+
+
+def test_strict_body_is_forwarded_raw_with_normalized_metadata():
+    events = [{"type": 4, "timestamp": 1000, "data": {"href": "https://example.com/form"}}]
+    raw_is_normalized, message = _job_from_body(_session_body(events))
+
+    assert raw_is_normalized
+    assert message["payload"]["rrweb"]["events"] == events
+
+    raw_events, metadata = read_ingest_job(message)
+    assert raw_events == events
+    assert "unknown_extension_field" not in metadata
+    assert metadata["page_semantics"] == {"landmarks": []}
+    assert metadata["axe_preliminary_analysis"] is None
+    assert metadata["session_meta"]["session_id"] == "s-1"
+
+
+def test_coerced_body_is_forwarded_normalized():
+    events = [
+        {"type": "4", "timestamp": "1000", "data": {"href": "https://example.com/form"}},
+        {"type": 3, "timestamp": 2000.0, "data": {"source": 2, "type": 2, "id": 7}},
+    ]
+    raw_is_normalized, message = _job_from_body(_session_body(events))
+
+    assert not raw_is_normalized
+    assert "payload" not in message
+
+    raw_events, metadata = read_ingest_job(message)
+    assert [(event["type"], event["timestamp"]) for event in raw_events] == [(4, 1000), (3, 2000)]
+    assert "unknown_extension_field" not in metadata
+
+
+def test_legacy_payload_job_without_metadata_uses_original_body():
+    message = {
+        "job_type": "ingest",
+        "payload": {"rrweb": {"events": [{"type": 4, "timestamp": 1, "data": {}}]}, "page_semantics": {}},
+    }
+
+    raw_events, metadata = read_ingest_job(message)
+
+    assert raw_events == [{"type": 4, "timestamp": 1, "data": {}}]
+    assert metadata == {"page_semantics": {}}
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from services.core.job_queue import JobPublishQueue
+
+
+class FlakyBroker:
+    """Publicador que falha nas primeiras ``failures`` chamadas."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = 0
+        self.published = []
+
+    async def publish(self, body: bytes) -> None:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("broker indisponível")
+        self.published.append(body)
+
+
+def test_failed_publish_is_retried_until_it_succeeds():
+    broker = FlakyBroker(failures=2)
+
+    async def scenario():
+        queue = JobPublishQueue(broker.publish, workers=1, max_bytes=1024, retry_delay=0)
+        queue.start()
+        await queue.submit(b'{"job": 1}')
+        await queue.stop(timeout=1)
+        return queue
+
+    queue = asyncio.run(scenario())
+
+    assert broker.published == [b'{"job": 1}']
+    assert broker.calls == 3
+    assert queue.pending_bytes == 0
+
+
+def test_job_is_not_dropped_after_repeated_failures():
+    broker = FlakyBroker(failures=10)
+
+    async def scenario():
+        queue = JobPublishQueue(broker.publish, workers=1, max_bytes=1024, retry_delay=0)
+        queue.start()
+        await queue.submit(b'{"job": 1}')
+        await queue.stop(timeout=1)
+
+    asyncio.run(scenario())
+
+    assert broker.published == [b'{"job": 1}']
+    assert broker.calls == 11
+
+
+def test_retry_wait_does_not_block_other_jobs():
+    broker = FlakyBroker(failures=1)
+
+    async def scenario():
+        queue = JobPublishQueue(broker.publish, workers=1, max_bytes=1024, retry_delay=60)
+        queue.start()
+        await queue.submit(b'{"job": 1}')
+        await queue.submit(b'{"job": 2}')
+        for _ in range(5):
+            await asyncio.sleep(0)
+        # O job 1 está esperando a nova tentativa; o único worker já publicou o 2.
+        assert broker.published == [b'{"job": 2}']
+        assert queue.pending_bytes == len(b'{"job": 1}')
+        await queue.stop(timeout=0.05)
+
+    asyncio.run(scenario())
+
+    assert broker.published == [b'{"job": 2}', b'{"job": 1}']
+
+
+def test_pending_jobs_get_a_last_attempt_on_shutdown():
+    broker = FlakyBroker(failures=1)
+
+    async def scenario():
+        # Espera longa entre tentativas: o job ainda está pendente quando o stop expira.
+        queue = JobPublishQueue(broker.publish, workers=1, max_bytes=1024, retry_delay=60)
+        queue.start()
+        await queue.submit(b'{"job": 1}')
+        await asyncio.sleep(0)
+        await queue.stop(timeout=0.05)
+
+    asyncio.run(scenario())
+
+    assert broker.published == [b'{"job": 1}']
+
+
+def test_byte_bound_falls_back_to_inline_publish():
+    broker = FlakyBroker()
+
+    async def scenario():
+        queue = JobPublishQueue(broker.publish, workers=1, max_bytes=10, retry_delay=0)
+        queue.start()
+        await queue.submit(b"12345678")
+        assert broker.published == []
+        # Passaria do limite de bytes pendentes: publica dentro da chamada.
+        await queue.submit(b"abcdef")
+        assert broker.published == [b"abcdef"]
+        await queue.stop(timeout=1)
+
+    asyncio.run(scenario())
+
+    assert sorted(broker.published) == [b"12345678", b"abcdef"]
+
+
+def test_without_workers_publish_errors_reach_the_caller():
+    broker = FlakyBroker(failures=1)
+
+    async def scenario():
+        queue = JobPublishQueue(broker.publish, workers=0, max_bytes=1024)
+        queue.start()
+        await queue.submit(b"{}")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(scenario())
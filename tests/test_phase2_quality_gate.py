@@ -1,3 +1,6 @@
+import asyncio
+
+from services.semantic_analysis.phase2 import runner as phase2_runner
 from services.semantic_analysis.phase2.models import GoalHypothesis, InsightItem, SessionHypothesis, StructuredSessionAnalysis
 from services.semantic_analysis.phase2.quality import is_bad_text, score_analysis_quality
 from services.semantic_analysis.phase2.repair import repair_analysis_with_bundle
@@ -159,3 +162,22 @@ def test_repair_improves_quality_and_replaces_bad_descriptions():
     assert repaired.hypotheses[0].justification
     assert after["score"] > before["score"]
     assert after["grade"] in {"acceptable", "good"}
+
+
+def test_final_analysis_skips_llm_when_disabled(monkeypatch):
+    async def _fail(*args, **kwargs):
+        raise AssertionError("LLM não deveria ser chamado")
+
+    monkeypatch.setattr(phase2_runner, "request_final_analysis", _fail)
+    bundle = SemanticSessionBundle(page_context={"page_type": "form", "page_goal": "coleta_dados_solicitacao"})
+
+    result = asyncio.run(phase2_runner.generate_final_session_analysis(bundle, use_llm=False))
+
+    assert result.status == "ok"
+    assert result.pipeline_trace["backend"] == "deterministic"
+    assert result.pipeline_trace["skipped_reason"] == "insufficient_user_actions"
+    assert result.structured_analysis.behavioral_patterns
+    assert result.structured_analysis.evidence_used == [
+        "page_context.page_type:form",
+        "page_context.page_goal:coleta_dados_solicitacao",
+    ]
@@ -1,6 +1,7 @@
 from services.semantic_analysis.phase2.evidence import build_compact_evidence_from_bundle, compact_evidence_used
-from services.semantic_analysis.phase2.models import GoalHypothesis, SessionHypothesis, StructuredSessionAnalysis
+from services.semantic_analysis.phase2.models import DeterministicSessionAnalysis, GoalHypothesis, SessionHypothesis, StructuredSessionAnalysis
 from services.semantic_analysis.phase2.repair import repair_analysis_with_bundle
+from services.semantic_analysis.phase2.runner import _fallback_final_analysis
 from services.semantic_analysis.semantic_bundle import AnalysisReadySummary, SemanticSessionBundle
 
 
@@ -107,3 +108,15 @@ def test_build_compact_evidence_from_bundle_generates_short_refs():
     assert "canonical_interaction_distribution:text_entry=609" in evidence
     assert "heuristic_distribution:dead_click=8" in evidence
     assert "axe_violation:color-contrast" in evidence
+
+
+def test_deterministic_fallback_accepts_sparse_session_without_padding():
+    result = _fallback_final_analysis(SemanticSessionBundle())
+    analysis = result.structured_analysis
+
+    assert isinstance(analysis, DeterministicSessionAnalysis)
+    assert [item.label for item in analysis.behavioral_patterns] == ["structured_form_progress"]
+    assert not any(
+        item.startswith(("canonical_interactions:", "segments:", "heuristic_matches:"))
+        for item in analysis.evidence_used
+    )
@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from services.semantic_analysis.semantic_bundle import SemanticSessionBundle
+from services.session_processing import session_job_processor as processor
+
+
+EVENTS = [
+    {"type": 4, "timestamp": 1000, "data": {"href": "https://example.com/form", "width": 800, "height": 600}},
+    {"type": 3, "timestamp": 1500, "data": {"source": 1, "positions": [{"x": 10, "y": 20, "id": 1, "timeOffset": 0}]}},
+]
+
+
+class _FakeAnalysis(BaseModel):
+    structured_analysis: dict = {}
+    status: str = "ok"
+
+
+@pytest.fixture
+def persisted(monkeypatch):
+    """Troca o pipeline semântico e a gravação no banco por versões locais."""
+    calls = []
+
+    async def fake_pipeline(events, processed, extension_metadata=None):
+        return SemanticSessionBundle(), _FakeAnalysis()
+
+    def fake_persist(session, **values):
+        calls.append(values)
+
+    monkeypatch.setattr(processor, "run_semantic_pipeline", fake_pipeline)
+    monkeypatch.setattr(processor, "_persist_analysis", fake_persist)
+    return calls
+
+
+def _process(**kwargs):
+    return asyncio.run(
+        processor.process_session_events(
+            session=None,
+            user_id="user-1",
+            session_uuid="session-1",
+            raw_events=EVENTS,
+            force=True,
+            **kwargs,
+        )
+    )
+
+
+def test_failed_upload_keeps_analysis_from_being_completed(persisted):
+    async def upload_failed():
+        raise RuntimeError("Upload para MinIO falhou")
+
+    with pytest.raises(RuntimeError):
+        _process(before_completed=upload_failed)
+
+    assert persisted == []
+
+
+def test_analysis_is_completed_after_upload(persisted):
+    order = []
+
+    async def upload_done():
+        order.append("upload")
+
+    _process(before_completed=upload_done)
+
+    assert order == ["upload"]
+    assert [call["processing_status"] for call in persisted] == ["completed"]
+
+
+def _stored_analysis():
+    return processor.SessionAnalysis(
+        session_uuid="session-1",
+        user_id="user-1",
+        narrative={"text": "Análise anterior"},
+        process_stats={
+            "total_events": 2,
+            "kinematic_vectors": 1,
+            "user_actions": 0,
+            "ml_insights": 0,
+            "rage_clicks": 0,
+        },
+        processing_status="completed",
+    )
+
+
+def test_unchanged_input_reuses_stored_analysis(persisted, monkeypatch):
+    async def pipeline_must_not_run(*args, **kwargs):
+        raise AssertionError("pipeline executado com entrada inalterada")
+
+    monkeypatch.setattr(processor, "run_semantic_pipeline", pipeline_must_not_run)
+    monkeypatch.setattr(processor, "_find_unchanged_analysis", lambda session, **kwargs: _stored_analysis())
+    monkeypatch.setattr(processor, "mark_analysis_status", lambda session, **kwargs: _stored_analysis())
+
+    response = asyncio.run(
+        processor.process_session_events(
+            session=None,
+            user_id="user-1",
+            session_uuid="session-1",
+            raw_events=EVENTS,
+        )
+    )
+
+    assert response.narrative == "Análise anterior"
+    assert persisted == []
+
+
+def test_force_reruns_pipeline_even_with_unchanged_input(persisted, monkeypatch):
+    def reuse_must_not_be_checked(session, **kwargs):
+        raise AssertionError("atalho por content_hash consultado com force=True")
+
+    monkeypatch.setattr(processor, "_find_unchanged_analysis", reuse_must_not_be_checked)
+
+    _process()
+
+    assert [call["processing_status"] for call in persisted] == ["completed"]
+
+
+def test_upload_overlaps_pipeline_when_input_changed(persisted, monkeypatch):
+    order = []
+
+    async def scenario():
+        pipeline_started = asyncio.Event()
+
+        async def fake_pipeline(events, processed, extension_metadata=None):
+            order.append("pipeline")
+            pipeline_started.set()
+            return SemanticSessionBundle(), _FakeAnalysis()
+
+        async def upload_done():
+            # Só termina depois que o pipeline começou: se o processador aguardasse
+            # o upload antes do pipeline, este wait_for estouraria.
+            await asyncio.wait_for(pipeline_started.wait(), timeout=1)
+            order.append("upload")
+
+        monkeypatch.setattr(processor, "run_semantic_pipeline", fake_pipeline)
+        monkeypatch.setattr(processor, "_find_unchanged_analysis", lambda session, **kwargs: None)
+
+        upload = asyncio.create_task(upload_done())
+        await processor.process_session_events(
+            session=None,
+            user_id="user-1",
+            session_uuid="session-1",
+            raw_events=EVENTS,
+            before_completed=lambda: upload,
+        )
+
+    asyncio.run(scenario())
+
+    assert order == ["pipeline", "upload"]
+    assert [call["processing_status"] for call in persisted] == ["completed"]
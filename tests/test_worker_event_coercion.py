@@ -0,0 +1,67 @@
+import orjson
+
+from services.session_processing.data_processor import SessionPreprocessor
+from services.session_processing.ingest_jobs import build_ingest_job_body, read_ingest_job, validate_ingest_payload
+from services.session_processing.session_job_processor import _iter_rrweb_events
+
+
+PAGE_URL = "https://example.com/form"
+
+# Valores que o /ingest aceita por coerção (modo lax do Pydantic).
+LOOSE_EVENTS = [
+    {"type": "4", "timestamp": "1000", "data": {"href": PAGE_URL, "width": 800, "height": 600}},
+    {
+        "type": "2",
+        "timestamp": "1001",
+        "data": {
+            "node": {
+                "type": 0,
+                "id": 1,
+                "childNodes": [
+                    {"type": 2, "id": 2, "tagName": "button", "attributes": {"id": "send"}, "childNodes": []}
+                ],
+            }
+        },
+    },
+    {"type": 3, "timestamp": 2000.0, "data": {"source": 2, "type": 2, "id": 2, "x": 10, "y": 20}},
+]
+
+
+def _assert_session_processed(raw_events):
+    processed = SessionPreprocessor.process(_iter_rrweb_events(raw_events))
+
+    assert processed.page_metadata.initial_url == PAGE_URL
+    assert processed.initial_timestamp == 1000
+    assert processed.total_duration == 1000
+    assert processed.raw_actions
+
+
+def test_loose_event_values_survive_ingest_and_worker():
+    raw_body = orjson.dumps({"rrweb": {"events": LOOSE_EVENTS}})
+    payload, raw_is_normalized = validate_ingest_payload(orjson.loads(raw_body))
+    _, message_body = build_ingest_job_body(
+        payload,
+        "user-1",
+        raw_body=raw_body if raw_is_normalized else None,
+    )
+
+    raw_events, _ = read_ingest_job(orjson.loads(message_body))
+
+    _assert_session_processed(raw_events)
+
+
+def test_worker_coerces_raw_payload_values():
+    # Jobs publicados com o corpo bruto e sessões já gravadas no storage.
+    message = {"job_type": "ingest", "payload": {"rrweb": {"events": LOOSE_EVENTS}}}
+
+    raw_events, _ = read_ingest_job(message)
+
+    _assert_session_processed(raw_events)
+
+
+def test_worker_skips_events_ingest_would_reject():
+    raw_events = [{"type": "meta", "timestamp": 5, "data": {}}, *LOOSE_EVENTS]
+
+    records = list(_iter_rrweb_events(raw_events))
+
+    assert [(record.type, record.timestamp) for record in records] == [(4, 1000), (2, 1001), (3, 2000)]
@@ -0,0 +1,64 @@
+"""
+Treina offline o Isolation Forest de referência usado pelo worker.
+
+Lê sessões no formato salvo no storage (``{"events": [...], "metadata": {...}}``),
+extrai as mesmas features de movimento do pipeline e persiste o modelo com
+``joblib`` (sem compressão, para permitir ``mmap_mode='r'`` no carregamento).
+
+Uso:
+    python train_iforest.py models/iforest.joblib sessoes/*.json
+
+Depois aponte ``ML_IFOREST_MODEL_PATH`` para o arquivo gerado.
+"""
+import argparse
+import logging
+from pathlib import Path
+from typing import List
+
+import joblib
+import numpy as np
+import orjson
+
+from services.domain.ml_analyzer import build_motion_features, train_reference_model
+from services.session_processing.data_processor import SessionPreprocessor
+from services.session_processing.models import RRWebEventRecord
+
+logger = logging.getLogger("train_iforest")
+
+
+def _session_features(path: Path) -> np.ndarray:
+    session_data = orjson.loads(path.read_bytes())
+    # Mesma coerção de type/timestamp do worker; um evento inválido levanta
+    # ValidationError (ValueError) e a sessão é ignorada no laço principal.
+    events = (RRWebEventRecord.from_raw(event) for event in session_data.get("events", []))
+    processed = SessionPreprocessor.process(events, extension_metadata=session_data.get("metadata"))
+    features, _ = build_motion_features(processed.kinematics)
+    return features
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", type=Path, help="Arquivo .joblib de saída")
+    parser.add_argument("sessions", type=Path, nargs="+", help="Arquivos JSON de sessões")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(message)s")
+
+    blocks: List[np.ndarray] = []
+    for path in args.sessions:
+        try:
+            blocks.append(_session_features(path))
+        except (OSError, ValueError) as exc:
+            logger.warning("Sessão ignorada %s: %s", path, exc)
+    total = sum(len(block) for block in blocks)
+    if not total:
+        raise SystemExit("Nenhuma feature de movimento extraída das sessões informadas.")
+
+    model = train_reference_model(blocks)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(model, args.output, compress=0)
+    logger.info("Modelo treinado com %s amostras de %s sessões -> %s", total, len(blocks), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,42 @@
 
 from __future__ import annotations
 
+import atexit
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Optional
 
 
 LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
 LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+_listener: Optional[QueueListener] = None
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+# Na saída do processo o listener drena a fila antes de fechar os handlers.
+atexit.register(_stop_listener)
+
 
 def configure_logging(service_name: str, log_filename: str, level: int = logging.INFO) -> logging.Logger:
-    """Configura logging em stdout e em arquivo rotativo separado por serviço."""
+    """Configura logging em stdout e em arquivo rotativo separado por serviço.
+
+    Quem loga só enfileira o registro (``QueueHandler``); a escrita em stdout e
+    no arquivo acontece numa thread do ``QueueListener``, fora do event loop.
+    """
+    global _listener
+
     logs_dir = Path("logs")
     logs_dir.mkdir(parents=True, exist_ok=True)
 
@@ -36,8 +60,13 @@ def configure_logging(service_name: str, log_filename: str, level: int = logging
     file_handler.setLevel(level)
     file_handler.setFormatter(formatter)
 
-    root_logger.addHandler(stream_handler)
-    root_logger.addHandler(file_handler)
+    # Reconfigurar (ex.: reload) encerra o listener anterior, drenando o que já estava na fila.
+    _stop_listener()
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    _listener = QueueListener(log_queue, stream_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+
+    root_logger.addHandler(QueueHandler(log_queue))
 
     for logger_name in ("uvicorn", "uvicorn.error", "uvicorn.access", "fastapi"):
         component_logger = logging.getLogger(logger_name)
@@ -8,6 +8,9 @@ logger = logging.getLogger("ux_auditor.snapshot")
 
 def log_snapshot(name: str, data: Any) -> None:
     """Registra uma amostra estruturada no logging de debug."""
+    # Os snapshots cobrem bundles inteiros: sem DEBUG ativo, nem serializa.
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     if isinstance(data, list) and data and hasattr(data[0], "model_dump"):
         payload = [item.model_dump() for item in data]
     elif hasattr(data, "model_dump"):
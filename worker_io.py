@@ -11,6 +11,7 @@ as mensagens sejam processadas mesmo em caso de falhas temporárias.
 """
 
 import asyncio
+import gc
 import json
 import signal
 import sys
@@ -18,11 +19,15 @@ from typing import Optional, Dict, Any, List
 
 import aio_pika
 import aioboto3
+import orjson
 from botocore.exceptions import BotoCoreError, ClientError
 from sqlmodel import Session as DBSession
 
 from config import settings
 from database import engine, init_db
+from services.core.storage import read_object_body
+from services.domain.ml_analyzer import load_reference_model
+from services.session_processing.ingest_jobs import read_ingest_job
 from services.session_processing.session_job_processor import mark_analysis_status, process_session_events
 from utils.logging_config import configure_logging
 
@@ -120,13 +125,10 @@ class MinIOStorageClient:
         try:
             client = self._get_client()
             
-            # Converte o dict para JSON
-            json_data = json.dumps(session_data, ensure_ascii=False, indent=2)
+            # Converte o dict para JSON compacto (orjson gera bytes UTF-8 direto)
+            json_data = orjson.dumps(session_data)
             
-            logger.info(
-                f"Iniciando upload para MinIO: {object_key} "
-                f"({len(json_data)} bytes)"
-            )
+            logger.debug("Iniciando upload para MinIO: %s (%s bytes)", object_key, len(json_data))
             
             await client.put_object(
                 Bucket=self.bucket_name,
@@ -135,14 +137,14 @@ class MinIOStorageClient:
                 ContentType='application/json'
             )
             
-            logger.info(f"Upload concluído com sucesso: {object_key}")
+            logger.info("Upload concluído com sucesso: %s", object_key)
             return True
             
         except (BotoCoreError, ClientError) as e:
-            logger.error(f"Erro ao fazer upload para MinIO: {e}")
+            logger.error("Erro ao fazer upload para MinIO: %s", e)
             return False
         except Exception as e:
-            logger.error(f"Erro inesperado durante upload: {e}")
+            logger.error("Erro inesperado durante upload: %s", e)
             return False
 
     async def download_session(self, user_id: str, session_uuid: str) -> dict:
@@ -156,10 +158,10 @@ class MinIOStorageClient:
                 Bucket=self.bucket_name,
                 Key=object_key,
             )
-            content = await response["Body"].read()
-            return json.loads(content.decode("utf-8"))
+            content = await read_object_body(response)
+            return await asyncio.to_thread(orjson.loads, content)
         except ClientError as e:
-            logger.error(f"Erro ao baixar sessão do MinIO: {e}")
+            logger.error("Erro ao baixar sessão do MinIO: %s", e)
             raise
 
 
@@ -192,7 +194,8 @@ class RabbitMQConsumer:
             # Criar conexão robusta com reconexão automática
             self._connection = await aio_pika.connect_robust(
                 self.rabbitmq_url,
-                reconnect_interval=5
+                reconnect_interval=5,
+                heartbeat=settings.RABBITMQ_HEARTBEAT,
             )
             
             # Adicionar callbacks para monitorar estado da conexão
@@ -241,13 +244,13 @@ class RabbitMQConsumer:
         """
         async with message.process():
             try:
-                # Decodificar corpo da mensagem
-                body = message.body.decode('utf-8')
-                message_data = json.loads(body)
+                # Decodificar corpo da mensagem (orjson lê os bytes sem cópia em str)
+                message_data = orjson.loads(message.body)
                 
-                logger.info(
-                    f"Mensagem recebida | Delivery Tag: {message.delivery_tag} | "
-                    f"Message ID: {message.message_id}"
+                logger.debug(
+                    "Mensagem recebida | Delivery Tag: %s | Message ID: %s",
+                    message.delivery_tag,
+                    message.message_id,
                 )
                 
                 # Extrair user_id e session_uuid da mensagem
@@ -257,24 +260,29 @@ class RabbitMQConsumer:
                 
                 if not user_id or not session_uuid:
                     logger.error(
-                        f"Mensagem inválida: user_id ou session_uuid ausentes. "
-                        f"Conteúdo: {message_data}"
+                        "Mensagem inválida: user_id ou session_uuid ausentes. Conteúdo: %s",
+                        message_data,
                     )
                     raise aio_pika.exceptions.MessageProcessError(
                         "Mensagem inválida: user_id ou session_uuid ausentes"
                     )
 
                 logger.info(
-                    f"Processando sessão: user_id={user_id}, session_uuid={session_uuid}, job_type={job_type}"
+                    "Processando sessão: user_id=%s, session_uuid=%s, job_type=%s",
+                    user_id,
+                    session_uuid,
+                    job_type,
                 )
 
                 raw_events: List[Dict[str, Any]]
                 metadata: Dict[str, Any] = {}
+                upload_task: Optional["asyncio.Task[bool]"] = None
                 
                 if job_type == "ingest":
-                    # Extração para job de ingestão inicial (proveniente da API /ingest)
-                    raw_events = message_data.get("events", [])
-                    metadata = message_data.get("metadata", {})
+                    # Extração para job de ingestão inicial (proveniente da API /ingest).
+                    # Eventos vêm do corpo original em 'payload' ou já separados em
+                    # 'events'; os metadados sempre chegam normalizados em 'metadata'.
+                    raw_events, metadata = read_ingest_job(message_data)
                     
                     if not isinstance(raw_events, list):
                         raise aio_pika.exceptions.MessageProcessError(
@@ -287,21 +295,22 @@ class RabbitMQConsumer:
                         "session_uuid": session_uuid,
                         "events": raw_events,
                         "metadata": metadata,
-                        "timestamp": message_data.get("timestamp"),
+                        "timestamp_ns": message_data.get("timestamp_ns"),
                     }
-
-                    upload_success = await self.storage_client.upload_session(
-                        user_id=user_id,
-                        session_uuid=session_uuid,
-                        session_data=storage_payload,
-                    )
-
-                    if not upload_success:
-                        logger.warning(
-                            f"Falha no upload para MinIO. Mensagem retornará para a fila. "
-                            f"Delivery Tag: {message.delivery_tag}"
+                    # Mensagens enfileiradas antes da troca ainda trazem 'timestamp' em ISO 8601.
+                    if "timestamp" in message_data:
+                        storage_payload["timestamp"] = message_data["timestamp"]
+
+                    # O upload não alimenta o pipeline (que usa os eventos em memória):
+                    # roda em paralelo com a análise e é aguardado antes de a análise
+                    # ser gravada como concluída.
+                    upload_task = asyncio.create_task(
+                        self.storage_client.upload_session(
+                            user_id=user_id,
+                            session_uuid=session_uuid,
+                            session_data=storage_payload,
                         )
-                        raise Exception("Upload para MinIO falhou")
+                    )
                 
                 elif job_type == "reprocess":
                     # Recuperação de dados do storage para jobs de reprocessamento
@@ -327,49 +336,64 @@ class RabbitMQConsumer:
                         f"Tipo de job desconhecido: {job_type}"
                     )
 
-                with DBSession(engine) as db_session:
-                    # Atualiza status para 'processing' no PostgreSQL antes de iniciar o pipeline
-                    mark_analysis_status(
-                        db_session,
-                        user_id=user_id,
-                        session_uuid=session_uuid,
-                        status="processing",
-                    )
+                async def ensure_uploaded() -> None:
+                    # A análise só é marcada como concluída com o payload bruto
+                    # no storage; sem ele, GET /raw e o reprocessamento falhariam.
+                    if upload_task is not None and not await upload_task:
+                        raise RuntimeError("Upload para MinIO falhou")
 
-                    try:
-                        # Executa o pipeline de análise pesada (reconstrução + ML + LLM)
-                        # Passamos o 'extension_metadata' para aproveitar as análises prévias do navegador.
-                        await process_session_events(
-                            session=db_session,
-                            user_id=user_id,
-                            session_uuid=session_uuid,
-                            raw_events=raw_events,
-                            extension_metadata=metadata,
-                        )
-                    except Exception as processing_error:
-                        mark_analysis_status(
+                try:
+                    with DBSession(engine) as db_session:
+                        # Atualiza status para 'processing' no PostgreSQL antes de iniciar o pipeline
+                        await asyncio.to_thread(
+                            mark_analysis_status,
                             db_session,
                             user_id=user_id,
                             session_uuid=session_uuid,
-                            status="failed",
-                            processing_error=str(processing_error),
+                            status="processing",
                         )
-                        raise
 
-                logger.info(
-                    f"Processamento concluído com sucesso | "
-                    f"Delivery Tag: {message.delivery_tag}"
-                )
+                        try:
+                            # Executa o pipeline de análise pesada (reconstrução + ML + LLM)
+                            # Passamos o 'extension_metadata' para aproveitar as análises prévias do navegador.
+                            await process_session_events(
+                                session=db_session,
+                                user_id=user_id,
+                                session_uuid=session_uuid,
+                                raw_events=raw_events,
+                                extension_metadata=metadata,
+                                # O atalho por content_hash vale para reentregas do
+                                # /ingest; o reprocessamento reexecuta por padrão.
+                                force=bool(message_data.get("force", job_type == "reprocess")),
+                                before_completed=ensure_uploaded,
+                            )
+                        except Exception as processing_error:
+                            await asyncio.to_thread(
+                                mark_analysis_status,
+                                db_session,
+                                user_id=user_id,
+                                session_uuid=session_uuid,
+                                status="failed",
+                                processing_error=str(processing_error),
+                            )
+                            raise
+                finally:
+                    # O ACK continua condicionado ao upload (ensure_uploaded acima):
+                    # mesmo se o pipeline falhar, o upload em voo é concluído antes de sair.
+                    if upload_task is not None:
+                        await upload_task
+
+                logger.info("Processamento concluído com sucesso | Delivery Tag: %s", message.delivery_tag)
                     
             except json.JSONDecodeError as e:
-                logger.error(f"Erro ao decodificar JSON: {e}")
+                logger.error("Erro ao decodificar JSON: %s", e)
                 # Rejeitar mensagem sem reentrega
                 raise aio_pika.exceptions.MessageProcessError(
                     f"JSON inválido: {e}"
                 )
                 
             except Exception as e:
-                logger.error(f"Erro ao processar mensagem: {e}")
+                logger.error("Erro ao processar mensagem: %s", e)
                 # Não enviar ACK - mensagem será reprocessada
                 raise
 
@@ -440,6 +464,11 @@ class WorkerIO:
         logger.info("Inicializando Worker IO...")
 
         init_db()
+
+        # O Isolation Forest de referência é carregado antes da primeira mensagem.
+        if settings.ML_IFOREST_MODEL_PATH:
+            load_reference_model(settings.ML_IFOREST_MODEL_PATH)
+            logger.info(f"Modelo Isolation Forest carregado: {settings.ML_IFOREST_MODEL_PATH}")
         
         # Inicializar cliente de storage
         self.storage_client = MinIOStorageClient(
@@ -520,5 +549,20 @@ async def main():
         sys.exit(1)
 
 
+def tune_gc() -> None:
+    """
+    Ajusta o coletor cíclico para o perfil do worker.
+
+    O pré-processamento aloca um objeto por amostra do cursor (dezenas de
+    milhares por sessão) e, com o limiar padrão, as coletas disparadas por essas
+    alocações custam tanto quanto o próprio laço. Os objetos importados no
+    startup são congelados e o limiar da geração 0 sobe, o que vale para o
+    processo inteiro e por isso é feito aqui, uma vez, e não no pré-processador.
+    """
+    gc.freeze()
+    gc.set_threshold(settings.WORKER_GC_THRESHOLD, 20, 100)
+
+
 if __name__ == "__main__":
+    tune_gc()
     asyncio.run(main())